@@ -0,0 +1,240 @@
+"""
+Replay the whole pipeline (fetch -> score -> aggregate -> map -> export -> notify sections) offline.
+
+Every source is served by a local stand-in that expands the recorded responses in
+benchmarks/fixtures/ to the requested scale, so the real parsing, filtering, scoring and mapping
+code runs with no network. Per-stage wall time, peak traced memory and items/sec go to a JSON file.
+
+    python -m benchmarks.bench_pipeline --sizes 1000 10000 100000 1000000 --out outputs/bench_pipeline.json
+"""
+import argparse, copy, json, os, platform, random, subprocess, sys, tempfile, time, tracemalloc
+from contextlib import ExitStack
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from src.main import load_config, dedup_stage, score_stage, aggregate_stage, map_stage, export_stage
+from src.ingest import fetch_all
+from src.notify import build_sections
+from src.velocity import open_velocity
+from src.mapping.token_index import open_index
+from src.sources import twitter, reddit, google_trends, pumpfun
+from src.mapping import dexscreener
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+SOURCES = ("twitter", "reddit", "google_trends", "pumpfun")
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        if name.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+class Replay:
+    """Deterministic fixture expansion: n records per source, titles salted from a Zipf-ish vocabulary."""
+
+    def __init__(self, per_source: int, now: datetime, seed: int = 7):
+        self.n, self.now, self.seed = per_source, now, seed
+        self.tweets = _fixture("twitter.jsonl")
+        self.posts = _fixture("reddit.json")
+        self.trends = _fixture("google_trends.json")
+        self.projects = _fixture("pumpfun.json")
+        self.pairs = _fixture("dexscreener.json")["pairs"]
+        words = {w.strip("$#.,:!?").lower() for t in self.tweets for w in t["content"].split()}
+        words |= {w.strip("$#.,:!?").lower() for p in self.posts for w in p["title"].split()}
+        self.vocab = sorted(w for w in words if w.isalpha()) + [f"tok{i}" for i in range(2000)]
+
+    def _rnd(self, source):
+        return random.Random(f"{self.seed}:{source}")
+
+    def _salt(self, rnd):
+        # two Zipf-distributed words (shared hot terms) + three uniform ones (mostly distinct content)
+        hot = [self.vocab[min(int(rnd.paretovariate(1.2)) - 1, len(self.vocab) - 1)] for _ in range(2)]
+        return " ".join(hot + [rnd.choice(self.vocab) for _ in range(3)])
+
+    def _ago(self, rnd):
+        return self.now - timedelta(minutes=rnd.randint(0, 24 * 60))
+
+    # --- snscrape: JSONL lines from the subprocess ---
+    def stream(self, cmd, time_budget_sec=None):
+        rnd = self._rnd("twitter")
+        prev = ""
+        for i in range(self.n):
+            t = dict(self.tweets[i % len(self.tweets)])
+            t["id"] = 1780000000 + i
+            t["url"] = f"https://twitter.com/u{i % 997}/status/{t['id']}"
+            # every tenth tweet is a retweet of the previous one
+            t["content"] = f"RT @u{i % 997}: {prev}" if i % 10 == 9 else f"{t['content']} {self._salt(rnd)}"
+            prev = t["content"]
+            t["date"] = self._ago(rnd).isoformat()
+            t["likeCount"] = rnd.randint(0, 5000)
+            t["retweetCount"] = rnd.randint(0, 800)
+            yield json.dumps(t) + "\n"
+
+    # --- PRAW: a combined subreddit listing, newest first ---
+    def reddit_client(self, *a, **k):
+        def new(limit=None):
+            rnd = self._rnd("reddit")
+            start = self.now.timestamp()
+            for i in range(min(self.n, limit or self.n)):
+                p = self.posts[i % len(self.posts)]
+                yield SimpleNamespace(fullname=f"t3_{i:x}", title=f"{p['title']} {self._salt(rnd)}",
+                                      subreddit=SimpleNamespace(display_name=p["subreddit"]),
+                                      permalink=p["permalink"], score=rnd.randint(0, 5000),
+                                      num_comments=p["num_comments"], created_utc=start - i * (86400 / self.n))
+        return SimpleNamespace(subreddit=lambda name: SimpleNamespace(new=new))
+
+    # --- pytrends: related_queries DataFrames per payload term ---
+    def trend_client(self, rows_per_segment):
+        replay = self
+
+        class _Trends:
+            def build_payload(self, kw_list, timeframe=None, geo=None):
+                self.kw_list, self.geo = kw_list, geo
+
+            def related_queries(self):
+                out = {}
+                for kw in self.kw_list:
+                    rnd = replay._rnd(f"trends:{self.geo}:{kw}")
+                    out[kw] = {}
+                    for seg, rows in replay.trends.items():
+                        out[kw][seg] = pd.DataFrame(
+                            [{"query": f"{rows[i % len(rows)][0]} {replay._salt(rnd)}",
+                              "value": rnd.randint(1, rows[i % len(rows)][1])} for i in range(rows_per_segment)])
+                return out
+        return _Trends
+
+    # --- Pump.fun: paged JSON per sort order ---
+    def pumpfun_get(self, url, params):
+        offset, limit, sort = params["offset"], params["limit"], params["sort"]
+        rnd = self._rnd(f"pumpfun:{sort}:{offset}")
+        page = []
+        for i in range(offset, min(offset + limit, self.n)):
+            p = dict(self.projects[i % len(self.projects)])
+            p["mint"] = f"{p['mint'][:32]}{i:012d}"
+            p["createdAt"] = int((self.now.timestamp() - i * 5) * 1000)
+            p["marketCap"] = p["usd_market_cap"] = rnd.uniform(1000, 500000)
+            page.append(p)
+        return {"projects": page}
+
+    # --- DexScreener search ---
+    def search(self, keyword, session=None, limiter=None):
+        out = []
+        for p in self.pairs:
+            p = copy.deepcopy(p)
+            p["baseToken"]["symbol"] = keyword.upper()[:10]
+            p["pairAddress"] = f"{p['pairAddress'][:20]}{abs(hash(keyword)) % 10**8}"
+            out.append(p)
+        return out
+
+def bench_config(cfg, per_source):
+    cfg = copy.deepcopy(cfg)
+    cfg["run"]["top_n"] = per_source
+    cfg["run"]["source_timeout_sec"] = 3600
+    cfg["run"].setdefault("incremental", {})["enabled"] = False
+    cfg["history"] = {"enabled": False}
+    src = cfg["sources"]
+    for name in SOURCES:
+        src[name]["enabled"] = True
+        src[name].pop("timeout_sec", None)
+    src["twitter"]["max_results"] = per_source
+    src["twitter"]["time_budget_sec"] = None
+    src["reddit"]["min_upvotes"] = 0
+    src["google_trends"]["cache"] = {"enabled": False}
+    src["pumpfun"]["limit"] = 200
+    src["pumpfun"]["max_pages"] = -(-per_source // 200)
+    src["pumpfun"]["kw_any"] = []
+    dex = cfg["mapping"]["dexscreener"]
+    dex["enabled"] = True
+    dex["rate_limit_per_min"] = 10 ** 9
+    dex["cache"] = {"enabled": False}
+    return cfg
+
+def run_pipeline(cfg, replay, out_dir, trace_memory=True):
+    gcfg = cfg["sources"]["google_trends"]
+    rows = max(1, -(-replay.n // (len(gcfg["regions"]) * len(gcfg["kw_seed"]) * len(replay.trends))))
+    stages = {}
+
+    def stage(name, n_in, fn):
+        if trace_memory:
+            tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        res = fn()
+        dt = time.perf_counter() - t0
+        stages[name] = {"seconds": round(dt, 4), "items_in": n_in,
+                        "items_per_sec": round(n_in / dt, 1) if dt > 0 else None,
+                        "peak_mb": round(tracemalloc.get_traced_memory()[1] / 2**20, 2) if trace_memory else None}
+        return res
+
+    trends_client = replay.trend_client(rows)
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.dict(os.environ, {"REDDIT_CLIENT_ID": "bench", "REDDIT_CLIENT_SECRET": "bench"}))
+        stack.enter_context(mock.patch.object(twitter, "_stream", replay.stream))
+        stack.enter_context(mock.patch.object(reddit, "_client", replay.reddit_client))
+        stack.enter_context(mock.patch.object(google_trends, "_borrow", trends_client))
+        stack.enter_context(mock.patch.object(google_trends, "_clients", google_trends.queue.LifoQueue()))
+        stack.enter_context(mock.patch.object(pumpfun, "_get", replay.pumpfun_get))
+        stack.enter_context(mock.patch.object(dexscreener, "_search", replay.search))
+        cfg["run"]["out_dir"] = out_dir
+        if cfg.get("velocity"):
+            cfg["velocity"]["path"] = os.path.join(out_dir, "velocity.npz")
+        if cfg["mapping"]["dexscreener"].get("index"):
+            cfg["mapping"]["dexscreener"]["index"]["path"] = os.path.join(out_dir, "token_index.sqlite")
+        velocity = open_velocity(cfg)
+        token_index = open_index(cfg["mapping"]["dexscreener"])
+
+        items, _ = stage("fetch", replay.n * len(SOURCES), lambda: fetch_all(cfg))
+        if token_index is not None:
+            token_index.add_pumpfun(items)
+        unique = stage("dedup", len(items), lambda: dedup_stage(cfg, items))
+        items_scored = stage("score", len(unique), lambda: score_stage(cfg, unique))
+        agg = stage("aggregate", len(items_scored), lambda: aggregate_stage(cfg, items_scored, velocity))
+        mappings = stage("map", min(len(agg), 50), lambda: map_stage(cfg, agg, token_index=token_index))
+        stage("export", len(items_scored), lambda: export_stage(cfg, items_scored, agg, mappings))
+        stage("notify", len(items_scored), lambda: build_sections(agg, mappings, items_scored, 10, 10))
+        if token_index is not None:
+            token_index.close()
+    return {"items": len(items), "hotspots": len(agg), "mappings": len(mappings), "stages": stages}
+
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except Exception:
+        return None
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--config", default="config.yaml")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000],
+                    help="total items per run, split evenly across the four sources")
+    ap.add_argument("--out", default="outputs/bench_pipeline.json")
+    ap.add_argument("--no-memory", action="store_true", help="skip tracemalloc (faster, timings less distorted)")
+    args = ap.parse_args()
+
+    base = load_config(args.config)
+    now = datetime.now(timezone.utc)
+    report = {"started_at": now.isoformat(), "git": _git_rev(), "python": sys.version.split()[0],
+              "platform": platform.platform(), "numpy": np.__version__, "pandas": pd.__version__, "runs": []}
+    if not args.no_memory:
+        tracemalloc.start()
+    for n in args.sizes:
+        per_source = max(1, n // len(SOURCES))
+        with tempfile.TemporaryDirectory() as out_dir:
+            res = run_pipeline(bench_config(base, per_source), Replay(per_source, now), out_dir, not args.no_memory)
+        res["size"] = n
+        report["runs"].append(res)
+        print(f"\n{n:>9} items requested, {res['items']} fetched, {res['hotspots']} hotspots")
+        for name, s in res["stages"].items():
+            mem = f"{s['peak_mb']:>9.1f} MB" if s["peak_mb"] is not None else ""
+            print(f"  {name:<10} {s['seconds']:>9.3f}s {s['items_per_sec'] or 0:>12.0f} items/s {mem}")
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Raw source responses (snscrape tweets, Reddit posts, Trends related queries, Pump.fun project
+pages, DexScreener search results), one gzip JSONL file per fetch call, partitioned by UTC day:
+
+    <dir>/<source>/date=YYYY-MM-DD/<HHMMSS>-<id>.jsonl.gz
+
+Each line is {"fetched_at": epoch seconds, "kind": ..., "params": {...}, "data": <raw payload>}.
+`python -m src.main backfill` replays these through the source parsers offline.
+"""
+import gzip, json, os, threading, time, uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone, timedelta
+from typing import List, Dict, Iterator, Optional, Tuple
+
+class Batch:
+    """Raw records of one fetch call; thread-safe, written as a single file when the call ends."""
+
+    def __init__(self):
+        self.records: List[Dict] = []
+        self.lock = threading.Lock()
+
+    def add(self, kind: str, data, **params):
+        with self.lock:
+            self.records.append({"fetched_at": time.time(), "kind": kind, "params": params, "data": data})
+
+class _NoBatch:
+    def add(self, kind: str, data, **params):
+        pass
+
+class Archive:
+    def __init__(self):
+        self.dir: Optional[str] = None
+        self.level = 6
+
+    def configure(self, cfg: Dict):
+        acfg = cfg.get("archive") or {}
+        self.dir = acfg.get("dir", "outputs/archive") if acfg.get("enabled") else None
+        self.level = acfg.get("compresslevel", 6)
+
+    @contextmanager
+    def batch(self, source: str):
+        if self.dir is None:
+            yield _NoBatch()
+            return
+        b = Batch()
+        try:
+            yield b
+        finally:
+            if b.records:
+                self._write(source, b.records)
+
+    def _write(self, source: str, records: List[Dict]):
+        now = datetime.now(timezone.utc)
+        path = os.path.join(self.dir, source, f"date={now:%Y-%m-%d}")
+        os.makedirs(path, exist_ok=True)
+        name = os.path.join(path, f"{now:%H%M%S}-{uuid.uuid4().hex[:8]}.jsonl.gz")
+        with gzip.open(f"{name}.tmp", "wt", encoding="utf-8", compresslevel=self.level) as f:
+            for rec in records:
+                f.write(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+        os.replace(f"{name}.tmp", name)
+
+archive = Archive()
+
+def partitions(base_dir: str, start: str, end: str,
+               sources: Optional[List[str]] = None) -> Dict[str, List[Tuple[str, str]]]:
+    """{date: [(source, file), ...]} for every archived day in [start, end] (YYYY-MM-DD)."""
+    out: Dict[str, List[Tuple[str, str]]] = {}
+    day, last = datetime.strptime(start, "%Y-%m-%d"), datetime.strptime(end, "%Y-%m-%d")
+    names = sources or (sorted(os.listdir(base_dir)) if os.path.isdir(base_dir) else [])
+    while day <= last:
+        date = day.strftime("%Y-%m-%d")
+        for source in names:
+            path = os.path.join(base_dir, source, f"date={date}")
+            if os.path.isdir(path):
+                out.setdefault(date, []).extend((source, os.path.join(path, f))
+                                                for f in sorted(os.listdir(path)) if f.endswith(".jsonl.gz"))
+        day += timedelta(days=1)
+    return out
+
+def read_file(path: str) -> Iterator[Dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,111 @@
+"""
+Offline re-evaluation of archived raw responses (see src/archive.py) with the current config.
+
+Every archived UTC day is one partition, replayed in its own worker process. The day's source
+files are parsed again by the source parsers and filtered by the current keyword lists and
+blacklist. Items are de-duplicated (an item seen by several runs keeps its last copy, then
+near-duplicates collapse), scored as of the day's last fetch and aggregated. The top hotspots
+are mapped with that day's archived DexScreener results under the current chain and liquidity
+filters. No network access is needed.
+
+    python -m src.main backfill --start 2026-01-01 --end 2026-03-31 --workers 8
+"""
+import os, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Tuple
+
+from .archive import partitions, read_file
+from .items import Item
+from .state import item_key
+from .main import SOURCES, dedup_stage, aggregate_stage
+
+def _parse(cfg: Dict, source: str, records: List[Dict]) -> List[Item]:
+    src = cfg["sources"][source]
+    whole_words = cfg.get("filters", {}).get("whole_words", False)
+    top_n = cfg["run"]["top_n"]
+    if source == "twitter":
+        from .sources.twitter import parse_tweets
+        return parse_tweets((r["data"] for r in records), src["kw_any"], top_n, whole_words)
+    if source == "reddit":
+        from .sources.reddit import parse_post
+        return [parse_post(r["data"]) for r in records if r["data"]["score"] >= src["min_upvotes"]]
+    if source == "pumpfun":
+        from .sources.pumpfun import parse_projects
+        return parse_projects([(r["params"]["sort"], r["data"]) for r in records],
+                              src.get("kw_any"), whole_words)[0]
+    if source == "google_trends":
+        from .sources.google_trends import build_items
+        related = {(r["params"]["region"], r["params"]["kw"]): r["data"] for r in records}
+        regions = list(dict.fromkeys(region for region, _ in related))
+        seeds = list(dict.fromkeys(kw for _, kw in related))
+        fetched = datetime.fromtimestamp(records[0]["fetched_at"], timezone.utc).replace(tzinfo=None)
+        return build_items(related, regions, seeds, top_n, fetched.isoformat() + "Z")
+    return []
+
+def replay_day(cfg: Dict, date: str, files: List[Tuple[str, str]], top_k: int = 50) -> Dict:
+    """Re-score one archived day; runs in a worker process."""
+    from .matcher import compile_matcher
+    from .scoring import score_items
+    from .mapping.dexscreener import normalize_keyword, pair_rows
+
+    t0 = time.perf_counter()
+    enabled = {s for s in SOURCES if (cfg["sources"].get(s) or {}).get("enabled")}
+    blacklist = compile_matcher(cfg.get("filters", {}).get("blacklist_any"), whole_words=True)
+    latest: Dict[str, Item] = {}
+    searches: Dict[str, List[Dict]] = {}
+    last_fetch = 0.0
+    for source, path in files:  # file names sort by fetch time within a day
+        records = list(read_file(path))
+        if not records:
+            continue
+        if source == "dexscreener":
+            for r in records:
+                searches[normalize_keyword(r["params"]["q"])] = r["data"]
+            continue
+        if source not in enabled:
+            continue
+        last_fetch = max(last_fetch, max(r["fetched_at"] for r in records))
+        for it in _parse(cfg, source, records):
+            if not blacklist.search(it.get("title")):
+                latest[item_key(it)] = it  # the same post seen by several runs keeps its last copy
+    items = dedup_stage(cfg, list(latest.values()))
+
+    now = datetime.fromtimestamp(last_fetch, timezone.utc) if last_fetch else None
+    scored = score_items(items, cfg["scoring"]["weights"], now=now)
+    agg = aggregate_stage(cfg, scored)
+    dex = cfg["mapping"]["dexscreener"]
+    top = agg[:top_k]
+    mappings = [dict(row, date=date) for a in top
+                for row in pair_rows(a["keyword"], searches.get(normalize_keyword(a["keyword"])) or [],
+                                     dex["chains"], dex["min_liquidity_usd"])]
+    return {"date": date, "items": len(scored), "seconds": round(time.perf_counter() - t0, 3),
+            "unmapped": sum(1 for a in top if normalize_keyword(a["keyword"]) not in searches),
+            "hotspots": [dict(a, date=date) for a in top], "mappings": mappings}
+
+def backfill(cfg: Dict, start: str, end: str, workers: Optional[int] = None, top_k: int = 50,
+             out_dir: Optional[str] = None) -> List[Dict]:
+    import pandas as pd
+    base = (cfg.get("archive") or {}).get("dir", "outputs/archive")
+    days = partitions(base, start, end)
+    if not days:
+        print(f"[backfill] nothing archived under {base} for {start}..{end}")
+        return []
+    out_dir = out_dir or os.path.join(cfg["run"]["out_dir"], "backfill")
+    workers = min(workers or os.cpu_count() or 1, len(days))
+    print(f"[backfill] {len(days)} days, {sum(map(len, days.values()))} files, {workers} workers")
+    t0 = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(replay_day, cfg, date, files, top_k) for date, files in sorted(days.items())]
+        for fut in as_completed(futures):
+            res = fut.result()
+            results.append(res)
+            print(f"[backfill] {res['date']}: {res['items']} items, {len(res['hotspots'])} hotspots, "
+                  f"{len(res['mappings'])} mappings ({res['unmapped']} unmapped) in {res['seconds']:.2f}s")
+    results.sort(key=lambda r: r["date"])
+    os.makedirs(out_dir, exist_ok=True)
+    pd.DataFrame([h for r in results for h in r["hotspots"]]).to_csv(f"{out_dir}/hotspots.csv", index=False)
+    pd.DataFrame([m for r in results for m in r["mappings"]]).to_csv(f"{out_dir}/dex_mappings.csv", index=False)
+    print(f"[backfill] done in {time.perf_counter() - t0:.1f}s. Wrote to {out_dir}/")
+    return results
@@ -0,0 +1,62 @@
+import os, json, sqlite3, threading, time
+from typing import Any, Optional
+
+from .metrics import metrics
+
+class TTLCache:
+    """
+    Small on-disk JSON cache backed by SQLite. Entries expire after `ttl_sec`; when the table
+    grows past `max_entries` the least recently used rows are evicted. Safe to share between threads.
+    """
+
+    def __init__(self, path: str, ttl_sec: float, max_entries: int = 5000, namespace: str = "default"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl = ttl_sec
+        self.max_entries = max_entries
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS cache (
+            ns TEXT, key TEXT, value TEXT, stored_at REAL, used_at REAL,
+            PRIMARY KEY (ns, key))""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS cache_used ON cache (ns, used_at)")
+        self.db.commit()
+
+    def get(self, key: str, ttl_sec: Optional[float] = None) -> Optional[Any]:
+        now = time.time()
+        ttl = self.ttl if ttl_sec is None else ttl_sec
+        with self.lock:
+            row = self.db.execute("SELECT value, stored_at FROM cache WHERE ns=? AND key=?",
+                                  (self.namespace, key)).fetchone()
+            if row is None or now - row[1] > ttl:
+                self.misses += 1
+                return None
+            self.db.execute("UPDATE cache SET used_at=? WHERE ns=? AND key=?", (now, self.namespace, key))
+            self.db.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        now = time.time()
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO cache VALUES (?,?,?,?,?)",
+                            (self.namespace, key, json.dumps(value, ensure_ascii=False), now, now))
+            n = self.db.execute("SELECT COUNT(*) FROM cache WHERE ns=?", (self.namespace,)).fetchone()[0]
+            if n > self.max_entries:
+                self.db.execute("""DELETE FROM cache WHERE ns=? AND key IN (
+                    SELECT key FROM cache WHERE ns=? ORDER BY used_at ASC LIMIT ?)""",
+                                (self.namespace, self.namespace, n - self.max_entries))
+            self.db.commit()
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0.0
+        return f"{self.namespace} cache: hits={self.hits} misses={self.misses} ({rate:.0f}% hit)"
+
+    def close(self):
+        metrics.cache(self.namespace, self.hits, self.misses)
+        with self.lock:
+            self.db.close()
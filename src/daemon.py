@@ -0,0 +1,144 @@
+import queue, threading, time
+from typing import Dict, List
+
+from .ingest import fetch_all, source_jobs
+from .mapping.dexscreener import open_cache
+from .mapping.token_index import open_index
+from .mapping.watchlist import open_watchlist
+from .state import open_state
+from .items import Item
+from .metrics import metrics, write_run_metrics
+from .velocity import open_velocity
+
+def _fetch(cfg: Dict, name: str, q: queue.Queue):
+    # always reports back, so the main loop takes the source out of `inflight` and schedules it again
+    items, err = [], None
+    try:
+        items, stats = fetch_all(cfg, only=[name])
+        err = (stats.get(name) or {}).get("error")
+    except Exception as e:
+        err = f"{type(e).__name__}: {e}"
+        metrics.inc("errors_total", stage="fetch", component=name)
+        print(f"[daemon] fetch {name} failed: {err}")
+    finally:
+        q.put((name, items, err))
+
+def _failed(what: str, e: Exception):
+    # a failing cycle is logged and counted; the daemon keeps running
+    metrics.inc("errors_total", stage="daemon", component=what)
+    print(f"[daemon] {what} failed: {type(e).__name__}: {e}")
+
+def run_daemon(cfg: Dict):
+    """
+    Long-running mode: every enabled source is fetched on its own interval
+    (sources.<name>.interval_sec) in a background thread, while source clients and HTTP sessions
+    stay warm in this process. After each fetch the latest items of all sources are re-scored and
+    aggregated; mapping, export and notifications only run when a new hotspot enters the top K.
+    """
+    # imported here to avoid a cycle: main imports this module lazily for --daemon
+    from .main import dedup_stage, score_stage, aggregate_stage, map_stage, export_stage, notify_stage, watchlist_stage
+
+    dcfg = cfg.get("daemon") or {}
+    names = list(source_jobs(cfg))
+    if not names:
+        print("[daemon] no sources enabled")
+        return
+    default_interval = dcfg.get("default_interval_sec", 900)
+    intervals = {n: cfg["sources"][n].get("interval_sec", default_interval) for n in names}
+    top_k = dcfg.get("hotspot_top_k", 20)
+    renotify_after = dcfg.get("renotify_after_sec", cfg["run"]["lookback_hours"] * 3600)
+
+    state = open_state(cfg)
+    dex_cache = open_cache(cfg["mapping"]["dexscreener"]) if cfg["mapping"]["dexscreener"]["enabled"] else None
+    velocity = open_velocity(cfg)  # sketches stay in memory between cycles, saved after each one
+    token_index = open_index(cfg["mapping"]["dexscreener"]) if cfg["mapping"]["dexscreener"]["enabled"] else None
+    watchlist = open_watchlist(cfg["mapping"]["dexscreener"]) if cfg["mapping"]["dexscreener"]["enabled"] else None
+    watch_interval = ((cfg["mapping"]["dexscreener"].get("watchlist") or {}).get("refresh_sec", 120))
+    next_watch = 0.0
+    q: queue.Queue = queue.Queue()
+    next_due = {n: 0.0 for n in names}
+    inflight = set()
+    latest: Dict[str, List[Item]] = {}
+    alerted: Dict[str, float] = {}  # keyword -> when it was first pushed
+    print("[daemon] schedules: " + ", ".join(f"{n}={intervals[n]}s" for n in names))
+
+    try:
+        while True:
+            now = time.monotonic()
+            for n in names:
+                if n not in inflight and next_due[n] <= now:
+                    inflight.add(n)
+                    next_due[n] = now + intervals[n]
+                    threading.Thread(target=_fetch, args=(cfg, n, q), name=f"daemon-{n}", daemon=True).start()
+            if watchlist is not None and next_watch <= now:
+                next_watch = now + watch_interval
+                try:
+                    with metrics.stage("watchlist"):
+                        watchlist_stage(cfg, watchlist)
+                except Exception as e:
+                    _failed("watchlist", e)
+            idle = [next_due[n] for n in names if n not in inflight]
+            if watchlist is not None:
+                idle.append(next_watch)
+            wait = max(0.5, min(idle) - now) if idle else dcfg.get("tick_sec", 5)
+            try:
+                done = [q.get(timeout=wait)]
+            except queue.Empty:
+                continue
+            while not q.empty():
+                done.append(q.get_nowait())
+            for name, items, err in done:
+                try:
+                    if items or not err:
+                        latest[name] = items  # on error keep the previous snapshot of this source
+                    if token_index is not None and name == "pumpfun":
+                        token_index.add_pumpfun(items)
+                except Exception as e:
+                    _failed("token_index", e)
+                finally:
+                    inflight.discard(name)
+            try:
+                all_items = [it for items in latest.values() for it in items]
+                with metrics.stage("dedup"):
+                    all_items = dedup_stage(cfg, all_items)
+                metrics.started = time.time()  # counters stay cumulative; durations are per cycle
+                with metrics.stage("score"):
+                    items_scored = score_stage(cfg, all_items, state)
+                with metrics.stage("aggregate"):
+                    agg = aggregate_stage(cfg, items_scored, velocity)
+                wall = time.time()
+                for kw in [k for k, t in alerted.items() if wall - t > renotify_after]:
+                    del alerted[kw]
+                new = [a["keyword"] for a in agg[:top_k] if a["keyword"] not in alerted]
+                if not new:
+                    print(f"[daemon] {len(items_scored)} items, no new hotspots")
+                    write_run_metrics(cfg)
+                    continue
+                print(f"[daemon] new hotspots: {', '.join(new)}")
+                with metrics.stage("map"):
+                    mappings = map_stage(cfg, agg, state, dex_cache, token_index)
+                if watchlist is not None:
+                    watchlist.add(mappings)
+                with metrics.stage("export"):
+                    export_stage(cfg, items_scored, agg, mappings)
+                with metrics.stage("notify"):
+                    notify_stage(cfg, agg, mappings, items_scored)
+                for kw in new:  # only once pushed: a failed cycle retries them on the next one
+                    alerted[kw] = wall
+                write_run_metrics(cfg)
+            except Exception as e:
+                _failed("cycle", e)
+                write_run_metrics(cfg, ok=False)
+    except KeyboardInterrupt:
+        print("[daemon] stopped")
+    finally:
+        if dex_cache is not None:
+            print(dex_cache.stats())
+            dex_cache.close()
+        if token_index is not None:
+            print(token_index.stats())
+            token_index.close()
+        if watchlist is not None:
+            watchlist.close()
+        if state is not None:
+            state.close()
@@ -0,0 +1,146 @@
+"""
+Collapse near-duplicate items (retweets, quote-tweets, cross-posts, copy-paste names) before scoring.
+
+Titles are reduced to their content-word sets and fingerprinted with MinHash. LSH banding
+(bands x rows signature slices) proposes candidate pairs, which are confirmed by exact Jaccard
+similarity and merged with union-find, so the whole pass is roughly linear in the number of
+items. Titles with fewer than `min_tokens` content words only collapse on an exact match.
+Items only collapse within one source (and one region for Google Trends): engagement and
+market caps are not comparable across sources, and aggregation counts cross-source resonance.
+"""
+import re
+from typing import List, Dict, Set, Tuple
+
+import numpy as np
+
+from .keywords import URL_RE, TOKEN_RE, STOPWORDS
+from .items import Item
+
+MENTION_RE = re.compile(r"@\w+")
+ENGAGEMENT = ("likes", "retweets", "num_comments")
+# sources whose score_raw is engagement (likes + 2*retweets, upvotes) and adds up across copies;
+# Pump.fun market caps and Trends values are levels: the canonical item keeps its own
+ADDITIVE_SOURCES = ("twitter", "reddit")
+_MASK = (1 << 64) - 1
+
+def _tokens(title: str) -> Set[str]:
+    text = MENTION_RE.sub(" ", URL_RE.sub(" ", (title or "").lower()))
+    return {w for _, w in TOKEN_RE.findall(text) if w not in STOPWORDS}
+
+def minhash_bands(token_sets: List[Set[str]], bands: int = 8, rows: int = 2, seed: int = 1,
+                  chunk: int = 50000) -> np.ndarray:
+    """(n, bands) array of LSH band keys from a bands*rows MinHash signature per token set."""
+    rng = np.random.default_rng(seed)
+    k = bands * rows
+    xor = rng.integers(0, 2**63, size=k, dtype=np.uint64)
+    mul = rng.integers(0, 2**63, size=k, dtype=np.uint64) | np.uint64(1)
+    out = np.zeros((len(token_sets), bands), dtype=np.uint64)
+    for lo in range(0, len(token_sets), chunk):
+        part = token_sets[lo:lo + chunk]
+        sizes = np.fromiter((len(t) for t in part), dtype=np.int64, count=len(part))
+        if not sizes.sum():
+            continue
+        # hash() is salted per process, which is fine: signatures never leave the run
+        flat = np.fromiter((hash(w) & _MASK for t in part for w in t), dtype=np.uint64, count=int(sizes.sum()))
+        with np.errstate(over="ignore"):
+            perm = ((flat[:, None] ^ xor) * mul) >> np.uint64(32)  # k xor-multiply permutations
+        nonempty = sizes > 0
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))[nonempty]
+        sig = np.minimum.reduceat(perm, starts, axis=0)  # (nonempty items, k)
+        keys = sig.reshape(len(sig), bands, rows)
+        band = keys[:, :, 0]
+        for r in range(1, rows):
+            with np.errstate(over="ignore"):
+                band = band * np.uint64(0x9E3779B97F4A7C15) + keys[:, :, r]
+        out[lo:lo + len(part)][nonempty] = band
+    return out
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+def _partition(it: Item) -> Tuple:
+    source = it.get("source")
+    return source, it.get("region") if source == "google_trends" else None
+
+def _merge(group: List[Item]) -> Item:
+    """Canonical item: the most engaged member, carrying the group's engagement and URLs."""
+    best = max(group, key=lambda it: it.get("score_raw") or 0)
+    out = best.copy()
+    if best.get("source") in ADDITIVE_SOURCES:
+        out["score_raw"] = sum(it.get("score_raw") or 0 for it in group)
+    for k in ENGAGEMENT:
+        if k in best:
+            out[k] = sum(it.get(k) or 0 for it in group)
+    out["urls"] = list(dict.fromkeys(it.get("url") for it in group if it.get("url")))
+    out["dup_count"] = len(group)
+    out["dup_sources"] = sorted({it.get("source") for it in group})
+    return out
+
+def collapse_duplicates(items: List[Item], min_jaccard: float = 0.7, min_tokens: int = 4,
+                        bands: int = 12, rows: int = 3, max_candidates: int = 4) -> List[Item]:
+    """
+    Collapse items whose titles share at least `min_jaccard` of their content words into
+    canonical items, in first-seen order. Error placeholder items are passed through untouched.
+    """
+    idx = [i for i, it in enumerate(items) if not str(it.get("title", "")).startswith("[error]")]
+    toks = [_tokens(items[i].get("title")) for i in idx]
+    parts = [_partition(items[i]) for i in idx]
+    uf = _UnionFind(len(idx))
+
+    # short titles: exact match on the normalized word set (or raw title when nothing is left)
+    exact: Dict[Tuple, int] = {}
+    long_ = []
+    for k, t in enumerate(toks):
+        if len(t) >= min_tokens:
+            long_.append(k)
+            continue
+        key = (parts[k], " ".join(sorted(t)) or str(items[idx[k]].get("title") or "").strip().lower())
+        if key in exact:
+            uf.union(exact[key], k)
+        else:
+            exact[key] = k
+
+    # long titles: LSH buckets per band, each member checked against the bucket's first few
+    if long_:
+        keys = minhash_bands([toks[k] for k in long_], bands, rows)
+        for b in range(bands):
+            _, inverse, counts = np.unique(keys[:, b], return_inverse=True, return_counts=True)
+            shared = np.flatnonzero(counts[inverse] > 1)
+            buckets: Dict[Tuple, List[int]] = {}
+            for pos in shared.tolist():
+                k = long_[pos]
+                a, root = toks[k], uf.find(k)
+                members = buckets.setdefault((parts[k], int(inverse[pos])), [])
+                for j in members:
+                    if uf.find(j) == root:
+                        break
+                    c = toks[j]
+                    if min(len(a), len(c)) < min_jaccard * max(len(a), len(c)):
+                        continue  # sizes alone rule the pair out
+                    inter = len(a & c)
+                    if inter >= min_jaccard * (len(a) + len(c) - inter):
+                        uf.union(k, j)
+                        break
+                if len(members) < max_candidates:
+                    members.append(k)
+
+    groups: Dict[int, List[int]] = {}
+    for k in range(len(idx)):
+        groups.setdefault(uf.find(k), []).append(k)
+    # canonical items go where their group first appeared; error items keep their place
+    merged = {idx[ks[0]]: (items[idx[ks[0]]] if len(ks) == 1 else _merge([items[idx[k]] for k in ks]))
+              for ks in groups.values()}
+    errors = set(range(len(items))) - set(idx)
+    return [merged.get(i, it) for i, it in enumerate(items) if i in merged or i in errors]
@@ -1,5 +1,7 @@
 import os, csv
-from typing import List, Dict
+from typing import List, Dict, Iterable
+
+from .items import Item, CSV_COLUMNS
 
 def ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
@@ -12,6 +14,14 @@ def export_csv(path: str, rows: List[Dict], fieldnames: List[str]):
         for r in rows:
             w.writerow({k: r.get(k,"") for k in fieldnames})
 
+def export_items_csv(path: str, items: Iterable[Item], columns: List[str] = CSV_COLUMNS):
+    """Items straight to CSV, one row per item, unset (None) fields left empty."""
+    ensure_dir(os.path.dirname(path))
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(columns)
+        w.writerows([getattr(it, c) for c in columns] for it in items)
+
 def export_report_md(path: str, hotspots: List[Dict], mappings: List[Dict]):
     ensure_dir(os.path.dirname(path))
     with open(path, "w", encoding="utf-8") as f:
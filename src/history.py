@@ -0,0 +1,111 @@
+"""
+Append-only run history as Parquet datasets (zstd), hive-partitioned on disk:
+
+    <dir>/items/date=YYYY-MM-DD/source=<source>/<run_id>.parquet
+    <dir>/hotspots/date=YYYY-MM-DD/<run_id>.parquet
+    <dir>/mappings/date=YYYY-MM-DD/<run_id>.parquet
+
+    python -m src.history first-seen "pepe"
+"""
+import os, sys, json
+from datetime import datetime, timezone
+from typing import List, Dict, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .items import Item
+
+_RUN = [("run_id", pa.string()), ("run_at", pa.timestamp("us", tz="UTC"))]
+SCHEMAS = {
+    "items": pa.schema([("title", pa.string()), ("url", pa.string()), ("score_raw", pa.float64()),
+                        ("score", pa.float64()), ("timestamp", pa.string()), ("region", pa.string()),
+                        ("subreddit", pa.string()), ("meta", pa.string()),
+                        ("urls", pa.string()), ("dup_count", pa.float64())] + _RUN),
+    "hotspots": pa.schema([("keyword", pa.string()), ("hits", pa.int64()), ("sources", pa.string()),
+                           ("score_sum", pa.float64()), ("rate", pa.float64()), ("velocity", pa.float64()),
+                           ("acceleration", pa.float64()), ("rank_score", pa.float64())] + _RUN),
+    "mappings": pa.schema([("keyword", pa.string()), ("chain", pa.string()), ("dex_id", pa.string()),
+                           ("pair_address", pa.string()), ("base_token", pa.string()), ("base_name", pa.string()),
+                           ("base_token_address", pa.string()),
+                           ("fdv", pa.float64()), ("liquidity_usd", pa.float64()), ("price_usd", pa.float64()),
+                           ("url", pa.string()), ("created_at", pa.float64())] + _RUN),
+}
+PARTITIONS = {"items": ["date", "source"], "hotspots": ["date"], "mappings": ["date"]}
+ITEM_COLUMNS = [f.name for f in SCHEMAS["items"] if f.name not in ("meta", "run_id", "run_at")] + ["source"]
+
+def _table(rows: pd.DataFrame, schema: pa.Schema) -> pa.Table:
+    cols = {}
+    for field in schema:
+        col = rows[field.name] if field.name in rows else pd.Series([None] * len(rows), index=rows.index)
+        if pa.types.is_floating(field.type) or pa.types.is_integer(field.type):
+            col = pd.to_numeric(col, errors="coerce")
+            if pa.types.is_integer(field.type):
+                col = col.fillna(0).astype("int64")
+        elif pa.types.is_string(field.type):
+            col = col.map(lambda v: None if v is None or v != v else (json.dumps(v, ensure_ascii=False, default=str)
+                                                                        if isinstance(v, (dict, list)) else str(v)))
+        cols[field.name] = pa.array(col.tolist(), type=field.type, from_pandas=True)
+    return pa.Table.from_pydict(cols, schema=schema)
+
+def _write(base_dir: str, table: str, df: pd.DataFrame, run_id: str, run_at: datetime):
+    if df.empty:
+        return
+    df = df.assign(run_id=run_id, run_at=pd.Timestamp(run_at))
+    date = run_at.strftime("%Y-%m-%d")
+    groups = df.groupby(df["source"].fillna("unknown")) if "source" in PARTITIONS[table] else [(None, df)]
+    for source, part in groups:
+        path = os.path.join(base_dir, table, f"date={date}") + (f"/source={source}" if source else "")
+        os.makedirs(path, exist_ok=True)
+        pq.write_table(_table(part, SCHEMAS[table]), os.path.join(path, f"{run_id}.parquet"), compression="zstd")
+
+def _items_frame(items: List[Item]) -> pd.DataFrame:
+    cols = {name: [it.get(name) for it in items] for name in ITEM_COLUMNS}
+    cols["meta"] = [it.meta for it in items]
+    return pd.DataFrame(cols)
+
+def append_run(base_dir: str, items: List[Item], agg: List[Dict], mappings: List[Dict],
+               run_at: Optional[datetime] = None) -> str:
+    """Append one run's scored items, hotspots and mappings; returns the run id."""
+    run_at = run_at or datetime.now(timezone.utc)
+    run_id = run_at.strftime("%Y%m%dT%H%M%S%fZ")
+    _write(base_dir, "items", _items_frame(items), run_id, run_at)
+    _write(base_dir, "hotspots", pd.DataFrame(agg), run_id, run_at)
+    _write(base_dir, "mappings", pd.DataFrame(mappings), run_id, run_at)
+    return run_id
+
+def read_history(base_dir: str, table: str, columns: Optional[List[str]] = None, start: Optional[str] = None,
+                 end: Optional[str] = None, sources: Optional[List[str]] = None, where=None) -> pd.DataFrame:
+    """
+    Read a history table, touching only the partitions in [start, end] (YYYY-MM-DD) / `sources`
+    and only the requested columns. `where` is an optional extra pyarrow.dataset expression.
+    """
+    path = os.path.join(base_dir, table)
+    if not os.path.isdir(path):
+        return pd.DataFrame(columns=columns or [])
+    fields = pa.schema([(p, pa.string()) for p in PARTITIONS[table]])
+    # the explicit schema lets files written before a column was added read back with nulls
+    schema = pa.unify_schemas([SCHEMAS[table], fields])
+    dset = ds.dataset(path, format="parquet", schema=schema, partitioning=ds.partitioning(fields, flavor="hive"))
+    flt = where
+    for cond in ((ds.field("date") >= start) if start else None,
+                 (ds.field("date") <= end) if end else None,
+                 ds.field("source").isin(sources) if sources and "source" in PARTITIONS[table] else None):
+        if cond is not None:
+            flt = cond if flt is None else flt & cond
+    return dset.to_table(columns=columns, filter=flt).to_pandas()
+
+def first_seen(base_dir: str, keyword: str) -> Optional[pd.Timestamp]:
+    """When a keyword first appeared among the aggregated hotspots."""
+    df = read_history(base_dir, "hotspots", columns=["run_at"], where=ds.field("keyword") == keyword.lower())
+    return None if df.empty else df["run_at"].min()
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "first-seen":
+        sys.exit("usage: python -m src.history first-seen <keyword>")
+    import yaml
+    with open("config.yaml", "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+    print(first_seen((cfg.get("history") or {}).get("dir", "outputs/history"), sys.argv[2]))
@@ -0,0 +1,108 @@
+from typing import List, Dict, Callable, Optional, Tuple
+
+from .parallel import run_parallel
+from .matcher import compile_matcher
+from .state import open_state
+from .items import Item
+from .metrics import metrics
+
+PUMPFUN_WATERMARK = "pumpfun.created_at_ms"
+REDDIT_WATERMARK = "reddit.newest_fullname"
+
+# source modules are imported inside their jobs: only enabled sources pay for PRAW / pytrends / requests
+
+def _google_trends_job(gcfg: Dict, top_n: int) -> List[Item]:
+    from .sources.google_trends import fetch_google_trends, open_trends_cache
+    cache = open_trends_cache(gcfg)
+    try:
+        return fetch_google_trends(gcfg["regions"], gcfg["kw_seed"], top_n=top_n,
+                                   timeframe=gcfg.get("timeframe", "now 1-d"),
+                                   max_workers=gcfg.get("max_workers", 2),
+                                   retries=gcfg.get("retries", 3), cache=cache)
+    finally:
+        if cache is not None:
+            print(cache.stats())
+            cache.close()
+
+def _reddit_job(cfg: Dict) -> List[Item]:
+    # in incremental mode the listing walk stops at the newest settled post of the previous run
+    from .sources.reddit import crawl_reddit
+    rcfg = cfg["sources"]["reddit"]
+    state = open_state(cfg)
+    try:
+        key = f"{REDDIT_WATERMARK}:{'+'.join(rcfg['subreddits'])}"
+        items, newest = crawl_reddit(rcfg["subreddits"], rcfg["min_upvotes"],
+                                     lookback_hours=cfg["run"]["lookback_hours"], top_n=cfg["run"]["top_n"],
+                                     after_fullname=state.get_meta(key) if state is not None else None,
+                                     settle_hours=rcfg.get("settle_hours", 6))
+        if state is not None and newest:
+            state.set_meta(key, newest)
+        return items
+    finally:
+        if state is not None:
+            state.close()
+
+def _pumpfun_job(cfg: Dict, whole_words: bool) -> List[Item]:
+    # in incremental mode the createdAt walk resumes from the watermark of the previous run
+    from .sources.pumpfun import crawl_pumpfun
+    pcfg = cfg["sources"]["pumpfun"]
+    state = open_state(cfg)
+    try:
+        wm = state.get_meta(PUMPFUN_WATERMARK) if state is not None else None
+        items, newest = crawl_pumpfun(limit=pcfg.get("limit", 120), kw_any=pcfg.get("kw_any"),
+                                      whole_words=whole_words, max_pages=pcfg.get("max_pages", 1),
+                                      watermark_ms=float(wm) if wm else None)
+        if state is not None and newest is not None:
+            state.set_meta(PUMPFUN_WATERMARK, str(newest))
+        return items
+    finally:
+        if state is not None:
+            state.close()
+
+def _twitter_job(tcfg: Dict, lookback: float, top_n: int, whole_words: bool) -> List[Item]:
+    from .sources.twitter import fetch_twitter
+    return fetch_twitter(tcfg["kw_any"], lookback_hours=lookback, max_results=tcfg["max_results"],
+                         top_n=top_n, whole_words=whole_words, time_budget_sec=tcfg.get("time_budget_sec"))
+
+def source_jobs(cfg: Dict) -> Dict[str, Callable[[], List[Item]]]:
+    """Build a zero-arg fetch job for every enabled source."""
+    src = cfg["sources"]
+    top_n = cfg["run"]["top_n"]
+    lookback = cfg["run"]["lookback_hours"]
+    whole_words = cfg.get("filters", {}).get("whole_words", False)
+    jobs = {}
+    if src["google_trends"]["enabled"]:
+        jobs["google_trends"] = lambda: _google_trends_job(src["google_trends"], top_n)
+    if src["reddit"]["enabled"]:
+        jobs["reddit"] = lambda: _reddit_job(cfg)
+    if src["twitter"]["enabled"]:
+        jobs["twitter"] = lambda: _twitter_job(src["twitter"], lookback, top_n, whole_words)
+    if src.get("pumpfun", {}).get("enabled"):
+        jobs["pumpfun"] = lambda: _pumpfun_job(cfg, whole_words)
+    return jobs
+
+def fetch_all(cfg: Dict, only: Optional[List[str]] = None) -> Tuple[List[Item], Dict[str, Dict]]:
+    """
+    Fetch every enabled source (or just those in `only`) concurrently. Items are merged as each
+    source finishes; a failing or slow source only loses its own items, and blacklisted titles
+    are dropped. Returns (items, per-source stats).
+    """
+    jobs = source_jobs(cfg)
+    if only is not None:
+        jobs = {name: fn for name, fn in jobs.items() if name in only}
+    blacklist = compile_matcher(cfg.get("filters", {}).get("blacklist_any"), whole_words=True)
+    default_timeout = cfg["run"].get("source_timeout_sec", 300)
+    timeouts = {name: cfg["sources"][name].get("timeout_sec", default_timeout) for name in jobs}
+    all_items, stats = [], {}
+    for name, items, err, dt in run_parallel(jobs, timeouts):
+        items = [it for it in items or [] if not blacklist.search(it.get("title"))]
+        all_items.extend(items)
+        # a failed job, or the "[error] ..." placeholder items a source returns instead of raising
+        errors = (1 if err else 0) + sum(1 for it in items if str(it.get("title", "")).startswith("[error]"))
+        if errors:
+            metrics.inc("errors_total", errors, stage="fetch", component=name)
+        metrics.set("source_duration_seconds", dt, source=name)
+        metrics.set("source_items", len(items), source=name)
+        stats[name] = {"items": len(items), "seconds": round(dt, 3), "error": err}
+        print(f"[fetch] {name}: {len(items)} items in {dt:.2f}s" + (f" ({err})" if err else ""))
+    return all_items, stats
@@ -0,0 +1,105 @@
+"""
+The item record every source builds and every stage passes along: fixed `__slots__` fields
+instead of a dict per item plus a nested `meta` dict, so a million-item window costs a
+fraction of the memory. It still reads and writes like the dicts it replaced (`it["title"]`,
+`it.get("score", 0)`, `it.get("meta")`); a field left at None counts as a missing key.
+"""
+from datetime import datetime
+from operator import attrgetter
+from typing import Dict
+
+FIELDS = ("source", "title", "url", "score_raw", "timestamp", "score", "region", "subreddit",
+          "urls", "dup_count", "dup_sources")
+# per-source metrics, exposed together as `meta`:
+#   twitter: likes, retweets (int)          reddit: num_comments (int)
+#   google_trends: segment, seed_kw (str)   pumpfun: mint, name, symbol, raydium_pool (str),
+#                                                    marketcap_usd (float), holders (int)
+META = ("likes", "retweets", "num_comments", "segment", "seed_kw",
+        "mint", "name", "symbol", "marketcap_usd", "holders", "raydium_pool")
+KEYS = frozenset(FIELDS + META + ("meta",))
+CSV_COLUMNS = ["source", "title", "url", "score_raw", "score", "timestamp", "region", "subreddit",
+               *META, "urls", "dup_count", "dup_sources"]
+
+class Item:
+    __slots__ = FIELDS + META
+
+    def __init__(self, source: str, title: str, url: str = "", score_raw: float = 0, timestamp: str = "",
+                 **fields):
+        self.source = source
+        self.title = title
+        self.url = url
+        self.score_raw = score_raw
+        self.timestamp = timestamp
+        # every slot is always set: reading an unset slot raises, which is slow on hot paths
+        self.score = self.region = self.subreddit = self.urls = self.dup_count = self.dup_sources = None
+        self.likes = self.retweets = self.num_comments = self.segment = self.seed_kw = None
+        self.mint = self.name = self.symbol = self.marketcap_usd = self.holders = self.raydium_pool = None
+        for k, v in fields.items():
+            setattr(self, k, v)
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "Item":
+        """Item from its dict form (nested `meta` included); keys it has no field for are dropped."""
+        it = cls(d.get("source"), d.get("title", ""), d.get("url", ""), d.get("score_raw", 0), d.get("timestamp", ""))
+        for k, v in d.items():
+            if k == "meta":
+                it.meta = v or {}
+            elif k in cls.__slots__:
+                setattr(it, k, v)
+        return it
+
+    # --- dict compatibility: only the fields and `meta` are keys, never methods ---
+    def get(self, key: str, default=None):
+        v = getattr(self, key) if key in KEYS else None
+        return default if v is None else v
+
+    def __getitem__(self, key: str):
+        if key not in KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value):
+        try:
+            setattr(self, key, value)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: str) -> bool:
+        return key in KEYS and getattr(self, key) is not None
+
+    @property
+    def meta(self) -> Dict:
+        return {k: v for k in META if (v := getattr(self, k)) is not None}
+
+    @meta.setter
+    def meta(self, values: Dict):
+        for k in META:
+            setattr(self, k, values.get(k))
+
+    def to_dict(self) -> Dict:
+        """The dict form items had before this record type (per-source metrics under `meta`)."""
+        d = {k: v for k in FIELDS if (v := getattr(self, k)) is not None}
+        d["meta"] = self.meta
+        return d
+
+    def copy(self) -> "Item":
+        it = Item.__new__(Item)
+        it.__setstate__(self.__getstate__())
+        return it
+
+    # pickled as a bare tuple of field values (stage payloads)
+    def __getstate__(self):
+        return _values(self)
+
+    def __setstate__(self, state):
+        for k, v in zip(self.__slots__, state):
+            setattr(self, k, v)
+
+    def __repr__(self):
+        return f"Item({self.to_dict()!r})"
+
+_values = attrgetter(*Item.__slots__)
+
+def error_item(source: str, error, **fields) -> Item:
+    """Placeholder a source returns instead of raising, so the run records what failed."""
+    return Item(source, f"[error] {error}", "", 0, datetime.utcnow().isoformat() + "Z", **fields)
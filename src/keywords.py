@@ -0,0 +1,58 @@
+import re
+from typing import List, Dict, Set, Iterable
+
+URL_RE = re.compile(r"https?://\S+|www\.\S+")
+TOKEN_RE = re.compile(r"([$#]?)([a-z][a-z0-9_]*[a-z0-9]|[a-z])")
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both but by
+can could did do does doing down during each few for from further get got had has have having he her here hers him
+his how i if in into is it its itself just let me more most my new no nor not now of off on once only or other our
+ours out over own same she should so some such than that the their them then there these they this those through to
+too under until up very was we were what when where which while who whom why will with would you your yours
+rt via amp lol omg wow going gonna today tonight yesterday tomorrow day days week year time people one two its im dont cant
+""".split())
+
+def extract_terms(title: str, max_ngram: int = 2) -> Dict[str, bool]:
+    """
+    Extract candidate keywords from a title: content-word unigrams, n-grams of consecutive
+    content words (stopwords break a phrase), plus cashtags/hashtags folded to their bare word.
+    Returns {term: is_tag}.
+    """
+    text = URL_RE.sub(" . ", (title or "").lower())
+    terms: Dict[str, bool] = {}
+    run: List[str] = []
+
+    def flush():
+        for n in range(2, max_ngram + 1):
+            for i in range(len(run) - n + 1):
+                terms.setdefault(" ".join(run[i:i + n]), False)
+        run.clear()
+
+    pos = 0
+    for m in TOKEN_RE.finditer(text):
+        # anything other than whitespace between tokens (punctuation) ends a phrase
+        if text[pos:m.start()].strip():
+            flush()
+        pos = m.end()
+        tag, word = m.group(1), m.group(2)
+        if tag:
+            terms[word] = True
+        if word in STOPWORDS or len(word) < 3:
+            flush()
+            continue
+        terms.setdefault(word, False)
+        run.append(word)
+    flush()
+    return terms
+
+def build_index(titles: Iterable[str], max_ngram: int = 2):
+    """Inverted index term -> list of item positions, plus the set of terms seen as cashtag/hashtag."""
+    index: Dict[str, List[int]] = {}
+    tags: Set[str] = set()
+    for i, title in enumerate(titles):
+        for term, is_tag in extract_terms(title, max_ngram).items():
+            index.setdefault(term, []).append(i)
+            if is_tag:
+                tags.add(term)
+    return index, tags
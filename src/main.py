@@ -1,77 +1,98 @@
-import os, yaml, pandas as pd
-from dotenv import load_dotenv
-
-from .sources.google_trends import fetch_google_trends
-from .sources.reddit import fetch_reddit
-from .sources.twitter import fetch_twitter
-from .sources.pumpfun import fetch_pumpfun_recent
-from .mapping.dexscreener import map_keywords_to_pairs
-from .scoring import score_items, aggregate_by_keyword
-from .export import export_csv, export_report_md
-from .notifiers.feishu import send_card
-from .notifiers.telegram import send_simple_card
-
-def main():
-    load_dotenv()
-    with open("config.yaml","r",encoding="utf-8") as f:
-        cfg = yaml.safe_load(f)
+import os, sys, argparse
 
-    out_dir = cfg["run"]["out_dir"]
-    top_n = cfg["run"]["top_n"]
-    lookback = cfg["run"]["lookback_hours"]
-
-    all_items = []
-
-    # Google Trends
-    if cfg["sources"]["google_trends"]["enabled"]:
-        gt = fetch_google_trends(cfg["sources"]["google_trends"]["regions"],
-                                 cfg["sources"]["google_trends"]["kw_seed"],
-                                 top_n=top_n)
-        all_items.extend(gt)
-
-    # Reddit
-    if cfg["sources"]["reddit"]["enabled"]:
-        rd = fetch_reddit(cfg["sources"]["reddit"]["subreddits"],
-                          cfg["sources"]["reddit"]["min_upvotes"],
-                          lookback_hours=lookback,
-                          top_n=top_n)
-        all_items.extend(rd)
-
-    # Twitter
-    if cfg["sources"]["twitter"]["enabled"]:
-        tw = fetch_twitter(cfg["sources"]["twitter"]["kw_any"],
-                           lookback_hours=lookback,
-                           max_results=cfg["sources"]["twitter"]["max_results"],
-                           top_n=top_n)
-        all_items.extend(tw)
-
-    # Pump.fun recent
-    if cfg["sources"].get("pumpfun", {}).get("enabled"):
-        pf = fetch_pumpfun_recent(limit=cfg["sources"]["pumpfun"].get("limit", 120),
-                                  kw_any=cfg["sources"]["pumpfun"].get("kw_any"))
-        all_items.extend(pf)
-
-    # Scoring
-    items_scored = score_items(all_items, cfg["scoring"]["weights"])
-
-    # Aggregate
-    agg = aggregate_by_keyword(items_scored, cfg["filters"]["whitelist_any"])
+from .state import open_state
+from .archive import archive
+from .metrics import metrics, instrument_http, recorded_run
+
+# Heavy or optional dependencies (pandas, numpy, requests, PRAW, pytrends, notifier clients) are
+# imported inside the stage that needs them, so narrow subcommands start fast.
+SOURCES = ("google_trends", "reddit", "twitter", "pumpfun")
+STAGES = ("fetch", "score", "map", "notify")  # per-stage subcommands
+
+def load_config(path: str = "config.yaml"):
+    import yaml
+    with open(path,"r",encoding="utf-8") as f:
+        return yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+def dedup_stage(cfg, all_items):
+    # near-duplicates (retweets, cross-posts, copy-paste names) collapse into one canonical item
+    dcfg = cfg.get("dedup") or {}
+    if not dcfg.get("enabled"):
+        return all_items
+    from .dedup import collapse_duplicates
+    items = collapse_duplicates(all_items, min_jaccard=dcfg.get("min_jaccard", 0.7),
+                                min_tokens=dcfg.get("min_tokens", 4), bands=dcfg.get("bands", 12),
+                                rows=dcfg.get("rows", 3))
+    print(f"[dedup] {len(all_items)} -> {len(items)} items")
+    return items
 
+def score_stage(cfg, all_items, state=None):
+    # Scoring (incremental mode only scores new or changed items)
+    from .scoring import score_items
+    weights = cfg["scoring"]["weights"]
+    if state is not None:
+        fresh, unchanged = state.diff_items(all_items)
+        state.upsert_items(score_items(fresh, weights), touched=unchanged)
+        items_scored = state.window(cfg["run"]["lookback_hours"], weights.get("recency_hours_half_life", 24))
+        print(f"[incremental] {len(fresh)} new/changed, {len(unchanged)} unchanged, {len(items_scored)} in window")
+        return items_scored
+    return score_items(all_items, weights)
+
+def aggregate_stage(cfg, items_scored, velocity=None):
+    from .scoring import aggregate_by_keyword
+    agg = aggregate_by_keyword(items_scored, cfg["filters"]["whitelist_any"],
+                               min_hits=cfg["filters"].get("min_term_hits", 1),
+                               max_ngram=cfg["filters"].get("max_ngram", 2),
+                               whole_words=cfg["filters"].get("whole_words", False),
+                               velocity=velocity)
+    if velocity is not None:
+        velocity.save()
+        rising = [f"{t} (+{st['velocity']:.1f}/h)" for t, st in velocity.trending(5) if st["velocity"] > 0]
+        if rising:
+            print("[velocity] rising: " + ", ".join(rising))
+    return agg
+
+def map_targets(cfg, agg, state=None):
+    """(top hotspots, keywords to query, moved keywords or None outside incremental mode)."""
+    top = agg[:50]
+    keywords = [a["keyword"] for a in top]
+    moved = None
+    if state is not None:
+        inc = cfg["run"]["incremental"]
+        moved = state.moved_keywords(top, inc.get("min_change", 0.1), inc.get("remap_after_sec", 3600))
+        keywords = [k for k in keywords if k in moved]
+        print(f"[incremental] re-mapping {len(keywords)}/{len(top)} keywords")
+    return top, keywords, moved
+
+def map_stage(cfg, agg, state=None, dex_cache=None, token_index=None, keywords=None):
+    """Map the top hotspots (or explicit `keywords`, bypassing the incremental filter) to pairs."""
     # Mapping on dexscreener
     mappings = []
     if cfg["mapping"]["dexscreener"]["enabled"]:
-        keywords = [a["keyword"] for a in agg[:50]]
+        from .mapping.dexscreener import map_keywords_to_pairs
+        top, moved = [], None
+        if keywords is None:
+            top, keywords, moved = map_targets(cfg, agg, state)
         mappings = map_keywords_to_pairs(
             keywords=keywords,
             min_liquidity_usd=cfg["mapping"]["dexscreener"]["min_liquidity_usd"],
-            chains=cfg["mapping"]["dexscreener"]["chains"]
+            chains=cfg["mapping"]["dexscreener"]["chains"],
+            max_workers=cfg["mapping"]["dexscreener"].get("max_workers", 8),
+            rate_limit_per_min=cfg["mapping"]["dexscreener"].get("rate_limit_per_min", 300),
+            cache=dex_cache,
+            index=token_index
         )
+        if moved is not None:
+            mappings = state.merge_mappings(top, moved, mappings)
+    return mappings
 
-    # Export
+def export_stage(cfg, items_scored, agg, mappings):
+    import pandas as pd
+    from .export import export_items_csv, export_report_md
+    out_dir = cfg["run"]["out_dir"]
     os.makedirs(out_dir, exist_ok=True)
-    # Raw items
-    df_items = pd.DataFrame(items_scored)
-    df_items.to_csv(f"{out_dir}/items_scored.csv", index=False)
+    # Raw items, written row by row (no DataFrame copy of the whole window)
+    export_items_csv(f"{out_dir}/items_scored.csv", items_scored)
 
     # Aggregated hotspots
     df_agg = pd.DataFrame(agg)
@@ -84,95 +105,227 @@ def main():
     # Markdown report
     export_report_md(f"{out_dir}/report.md", agg, mappings)
 
+    # Append-only Parquet history (optional)
+    hcfg = cfg.get("history") or {}
+    if hcfg.get("enabled"):
+        from .history import append_run
+        run_id = append_run(hcfg.get("dir", f"{out_dir}/history"), items_scored, agg, mappings)
+        print(f"[history] appended run {run_id}")
+
     print(f"Done. Wrote to {out_dir}/")
 
-    # Feishu push (optional)
-    notify_cfg = cfg.get("notify", {}).get("feishu", {})
-    if notify_cfg.get("enabled") and notify_cfg.get("webhook", "").startswith("http"):
-        webhook = notify_cfg["webhook"]
-        secret = os.getenv("FEISHU_BOT_SECRET") or None
-
-        # prepare sections
-        hs_items = []
-        for h in agg[: notify_cfg.get("max_hotspots", 10)]:
-            hs_items.append(f"**{h['keyword']}** | score={h['score_sum']:.2f} | hits={h['hits']} | {h['sources']}")
-
-        map_items = []
-        for m in mappings[: notify_cfg.get("max_mappings", 10)]:
-            tok = m.get("base_token") or m.get("base_name") or "N/A"
-            liq = m.get("liquidity_usd")
-            chain = m.get("chain")
-            url = m.get("url","")
-            map_items.append(f"`{m.get('keyword')}` → {tok} ({chain}) | liq=${liq} | {url}")
-
-        # pump.fun new coins (top by marketcap)
-        pf_items = []
-        try:
-            import pandas as _pd
-            df_pf = _pd.read_csv(f"{out_dir}/items_scored.csv")
-            df_pf = df_pf[df_pf["source"]=="pumpfun"].copy()
-            df_pf.sort_values("score_raw", ascending=False, inplace=True)
-            for _, r in df_pf.head(notify_cfg.get("max_mappings", 10)).iterrows():
-                title = str(r.get("title",""))
-                url = str(r.get("url",""))
-                mc = int(r.get("score_raw") or 0)
-                pf_items.append(f"{title} | MC=${mc} | {url}")
-        except Exception:
-            pass
-
-        sections = [
-            {"header": "Hotspots（聚合Top）", "items": hs_items or ["暂无"]},
-            {"header": "DexScreener 映射", "items": map_items or ["暂无"]},
-            {"header": "Pump.fun 新发币", "items": pf_items or ["暂无"]},
-        ]
-        try:
-            resp = send_card(webhook, "Daily Overseas Hotspot → Crypto Mapping", sections, secret=secret)
-            print("Feishu push:", resp)
-        except Exception as e:
-            print("Feishu push error:", e)
-
-    # Telegram push (optional)
-    tg_cfg = cfg.get("notify", {}).get("telegram", {})
-    if tg_cfg.get("enabled"):
-        token = os.getenv(tg_cfg.get("token_env", "TELEGRAM_BOT_TOKEN"))
-        chat_id = tg_cfg.get("chat_id")
-        if token and chat_id:
-            # reuse sections built above if exist, else rebuild minimal
-            try:
-                if 'sections' not in locals():
-                    hs_items = [f"{h['keyword']} | score={h['score_sum']:.2f} | hits={h['hits']} | {h['sources']}" for h in agg[: tg_cfg.get("max_hotspots", 10)]]
-                    map_items = []
-                    for m in mappings[: tg_cfg.get("max_mappings", 10)]:
-                        tok = m.get("base_token") or m.get("base_name") or "N/A"
-                        liq = m.get("liquidity_usd")
-                        chain = m.get("chain")
-                        url = m.get("url", "")
-                        map_items.append(f"{m.get('keyword')} → {tok} ({chain}) | liq=${liq} | {url}")
-                    # pump.fun
-                    pf_items = []
-                    try:
-                        import pandas as _pd
-                        df_pf = _pd.read_csv(f"{out_dir}/items_scored.csv")
-                        df_pf = df_pf[df_pf["source"]=="pumpfun"].copy()
-                        df_pf.sort_values("score_raw", ascending=False, inplace=True)
-                        for _, r in df_pf.head(tg_cfg.get("max_mappings", 10)).iterrows():
-                            title = str(r.get("title",""))
-                            url = str(r.get("url",""))
-                            mc = int(r.get("score_raw") or 0)
-                            pf_items.append(f"{title} | MC=${mc} | {url}")
-                    except Exception:
-                        pass
-                    sections = [
-                        {"header": "Hotspots（聚合Top）", "items": hs_items or ["暂无"]},
-                        {"header": "DexScreener 映射", "items": map_items or ["暂无"]},
-                        {"header": "Pump.fun 新发币", "items": pf_items or ["暂无"]},
-                    ]
-                resp2 = send_simple_card(token, chat_id, "Daily Overseas Hotspot → Crypto Mapping", sections)
-                print("Telegram push:", resp2)
-            except Exception as e:
-                print("Telegram push error:", e)
-        else:
-            print("Telegram config missing token or chat_id; skip push")
+def watchlist_stage(cfg, watchlist, mappings=None):
+    # Re-price mapped pairs in batches instead of re-searching their keywords
+    import pandas as pd
+    if mappings:
+        watchlist.add(mappings)
+    dex = cfg["mapping"]["dexscreener"]
+    rows = watchlist.refresh(max_workers=dex.get("max_workers", 8),
+                             rate_limit_per_min=dex.get("rate_limit_per_min", 300))
+    out_dir = cfg["run"]["out_dir"]
+    os.makedirs(out_dir, exist_ok=True)
+    pd.DataFrame(rows).to_csv(f"{out_dir}/watchlist.csv", index=False)
+    movers = sorted((r for r in rows if r["liquidity_chg_pct"] is not None),
+                    key=lambda r: abs(r["liquidity_chg_pct"]), reverse=True)[:3]
+    print(f"[watchlist] refreshed {len(rows)} pairs" +
+          "".join(f"; {r['base_token']} liq {r['liquidity_chg_pct']:+.1f}%" for r in movers))
+    return rows
+
+def notify_stage(cfg, agg, mappings, items_scored):
+    # Feishu / Telegram push (optional), fanned out in parallel
+    from .notify import dispatch
+    dispatch(cfg, agg, mappings, items_scored)
+
+def open_mapping(cfg):
+    """(DexScreener search cache, local token index), each None when disabled."""
+    dex = cfg["mapping"]["dexscreener"]
+    if not dex["enabled"]:
+        return None, None
+    from .mapping.dexscreener import open_cache
+    from .mapping.token_index import open_index
+    return open_cache(dex), open_index(dex)
+
+def close_all(*resources):
+    for r in resources:
+        if r is None:
+            continue
+        if hasattr(r, "stats"):
+            print(r.stats())
+        r.close()
+
+def run_once(cfg):
+    from .ingest import fetch_all
+    from .velocity import open_velocity
+    from .mapping.watchlist import open_watchlist
+    with recorded_run(cfg):
+        # Sources (fetched concurrently, each with its own timeout)
+        with metrics.stage("fetch"):
+            all_items, fetch_stats = fetch_all(cfg)
+        metrics.set("stage_items", len(all_items), stage="fetch")
+
+        state = open_state(cfg)
+        dex_cache, token_index = open_mapping(cfg)
+        if token_index is not None:
+            token_index.add_pumpfun(all_items)
+        with metrics.stage("dedup"):
+            all_items = dedup_stage(cfg, all_items)
+        metrics.set("stage_items", len(all_items), stage="dedup")
+        with metrics.stage("score"):
+            items_scored = score_stage(cfg, all_items, state)
+        metrics.set("stage_items", len(items_scored), stage="score")
+        with metrics.stage("aggregate"):
+            agg = aggregate_stage(cfg, items_scored, open_velocity(cfg))
+        metrics.set("stage_items", len(agg), stage="aggregate")
+        with metrics.stage("map"):
+            mappings = map_stage(cfg, agg, state, dex_cache, token_index)
+        metrics.set("stage_items", len(mappings), stage="map")
+        watchlist = open_watchlist(cfg["mapping"]["dexscreener"]) if cfg["mapping"]["dexscreener"]["enabled"] else None
+        if watchlist is not None:
+            with metrics.stage("watchlist"):
+                rows = watchlist_stage(cfg, watchlist, mappings)
+            metrics.set("stage_items", len(rows), stage="watchlist")
+            watchlist.close()
+        with metrics.stage("export"):
+            export_stage(cfg, items_scored, agg, mappings)
+        close_all(dex_cache, token_index, state)
+        with metrics.stage("notify"):
+            notify_stage(cfg, agg, mappings, items_scored)
+
+# --- per-stage subcommands: each reads the previous stage's payload and writes its own ---
+
+def _stage_path(cfg, name):
+    return os.path.join(cfg["run"]["out_dir"], ".stages", f"{name}.bin")
+
+def _load_stage(cfg, path, name):
+    from . import payload
+    path = path or _stage_path(cfg, name)
+    if not os.path.exists(path):
+        sys.exit(f"missing {path}: run the `{name}` stage first (or pass -i)")
+    return payload.load(path)
+
+def _save_stage(cfg, path, name, data):
+    from . import payload
+    path = path or _stage_path(cfg, name)
+    payload.dump(path, data)
+    print(f"[{name}] wrote {path}")
+
+def cmd_fetch(cfg, args):
+    from .ingest import fetch_all
+    # naming a source fetches it even when it is disabled in the config
+    for name in args.sources:
+        cfg["sources"][name]["enabled"] = True
+    items, _ = fetch_all(cfg, only=args.sources or None)
+    _, token_index = open_mapping(cfg)
+    if token_index is not None:
+        token_index.add_pumpfun(items)
+        token_index.close()
+    _save_stage(cfg, args.output, "fetch", {"items": items})
+
+def cmd_score(cfg, args):
+    from .velocity import open_velocity
+    items = _load_stage(cfg, args.input, "fetch")["items"]
+    state = open_state(cfg)
+    try:
+        items_scored = score_stage(cfg, dedup_stage(cfg, items), state)
+    finally:
+        close_all(state)
+    agg = aggregate_stage(cfg, items_scored, open_velocity(cfg))
+    for a in agg[:10]:
+        print(f"  {a['keyword']:<24} score={a['score_sum']:.2f} hits={a['hits']}")
+    _save_stage(cfg, args.output, "score", {"items": items_scored, "agg": agg})
+
+def cmd_map(cfg, args):
+    data = {"items": [], "agg": []} if args.keywords else _load_stage(cfg, args.input, "score")
+    state = None if args.keywords else open_state(cfg)
+    dex_cache, token_index = open_mapping(cfg)
+    try:
+        mappings = map_stage(cfg, data["agg"], state, dex_cache, token_index, keywords=args.keywords or None)
+    finally:
+        close_all(dex_cache, token_index, state)
+    if cfg["mapping"]["dexscreener"]["enabled"]:
+        from .mapping.watchlist import open_watchlist
+        watchlist = open_watchlist(cfg["mapping"]["dexscreener"])
+        if watchlist is not None:
+            watchlist.add(mappings)
+            watchlist.close()
+    for m in mappings[:20]:
+        print(f"  {m['keyword']:<16} {m.get('base_token') or '?':<10} {m.get('chain') or '?':<9} liq=${m['liquidity_usd']:,.0f} {m['url']}")
+    _save_stage(cfg, args.output, "map", dict(data, mappings=mappings))
+
+def cmd_notify(cfg, args):
+    data = _load_stage(cfg, args.input, "map")
+    notify_stage(cfg, data.get("agg", []), data.get("mappings", []), data.get("items", []))
+
+def cmd_backfill(cfg, args):
+    from .backfill import backfill
+    backfill(cfg, args.start, args.end or args.start, workers=args.workers, top_k=args.top_k, out_dir=args.out_dir)
+
+def cmd_run(cfg, args):
+    if args.daemon:
+        from .daemon import run_daemon
+        run_daemon(cfg)
+    elif cfg.get("profiles"):
+        from .profiles import run_profiles, profile_names
+        run_profiles(cfg, profile_names(cfg, args.profile))
+    else:
+        run_once(cfg)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m src.main")
+    ap.add_argument("--config", default="config.yaml")
+    ap.add_argument("--daemon", action="store_true", help="keep running with per-source schedules")
+    ap.add_argument("--profile", action="append",
+                    help="run only this profile (repeatable); --daemon and the stage commands take a single one")
+    sub = ap.add_subparsers(dest="cmd", metavar="{fetch,score,map,notify,run,backfill}")
+    p = sub.add_parser("fetch", help="fetch sources (default: all enabled) into a stage payload")
+    p.add_argument("sources", nargs="*", metavar="source", help=f"any of: {', '.join(SOURCES)}")
+    p.add_argument("-o", "--output")
+    p = sub.add_parser("score", help="dedup, score and aggregate fetched items")
+    p.add_argument("-i", "--input")
+    p.add_argument("-o", "--output")
+    p = sub.add_parser("map", help="map scored hotspots, or the given keywords, to DEX pairs")
+    p.add_argument("keywords", nargs="*")
+    p.add_argument("-i", "--input")
+    p.add_argument("-o", "--output")
+    p = sub.add_parser("notify", help="push a mapped payload to the enabled notifiers")
+    p.add_argument("-i", "--input")
+    p = sub.add_parser("run", help="the whole pipeline (default)")
+    p.add_argument("--daemon", action="store_true", default=argparse.SUPPRESS,
+                   help="keep running with per-source schedules")
+    p = sub.add_parser("backfill", help="re-score archived raw responses for past days, offline")
+    p.add_argument("--start", required=True, help="first day, YYYY-MM-DD (UTC)")
+    p.add_argument("--end", help="last day, inclusive (default: --start)")
+    p.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    p.add_argument("--top-k", type=int, default=50, help="hotspots kept and mapped per day")
+    p.add_argument("-o", "--out-dir", help="default: <out_dir>/backfill")
+    args = ap.parse_args(argv)
+    unknown = [s for s in getattr(args, "sources", []) if s not in SOURCES]
+    if unknown:
+        ap.error(f"unknown source(s): {', '.join(unknown)} (choose from {', '.join(SOURCES)})")
+
+    cfg = load_config(args.config)
+    daemon = args.cmd in (None, "run") and args.daemon
+    if args.profile and (daemon or args.cmd in ("fetch", "score", "map", "notify", "backfill")):
+        if len(args.profile) > 1:
+            ap.error(f"{'--daemon' if daemon else args.cmd} takes a single --profile")
+        from .profiles import profile_config
+        cfg = profile_config(cfg, args.profile[0])
+    elif args.profile and not cfg.get("profiles"):
+        ap.error("--profile given but config.yaml has no profiles")
+    if args.cmd in (None, "run", "fetch", "notify"):
+        # credentials for Reddit / Telegram / Feishu
+        from dotenv import load_dotenv
+        load_dotenv()
+    if args.cmd in (None, "run", *STAGES) and (cfg.get("metrics") or {}).get("enabled"):
+        instrument_http()
+    archive.configure(cfg)
+    cmd = {"fetch": cmd_fetch, "score": cmd_score, "map": cmd_map, "notify": cmd_notify,
+           "backfill": cmd_backfill}.get(args.cmd, cmd_run)
+    if args.cmd in STAGES:
+        with recorded_run(cfg, args.cmd):  # a full run records its own
+            cmd(cfg, args)
+    else:
+        cmd(cfg, args)
 
 
 if __name__ == "__main__":
@@ -1,39 +1,119 @@
 import requests
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+from requests.adapters import HTTPAdapter
+
+from ..ratelimit import RateLimiter
+from ..cache import TTLCache
+from ..archive import archive
+from .token_index import TokenIndex
 
 SEARCH_URL = "https://api.dexscreener.com/latest/dex/search"
+# DexScreener public limit for search/pairs endpoints: 300 requests per minute
+RATE_LIMIT_PER_MIN = 300
+
+_session: Optional[requests.Session] = None
+
+def get_session(pool_size: int = 8) -> requests.Session:
+    """Shared keep-alive session, created once per process."""
+    global _session
+    if _session is None:
+        s = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        s.mount("https://", adapter)
+        s.headers.update({"Accept": "application/json", "User-Agent": "hotspot-mapper/0.1"})
+        _session = s
+    return _session
+
+def normalize_keyword(keyword: str) -> str:
+    """Fold case and whitespace so variants of one keyword share a query."""
+    return " ".join((keyword or "").split()).lower()
+
+def _search(keyword: str, session: Optional[requests.Session] = None,
+            limiter: Optional[RateLimiter] = None) -> List[Dict]:
+    if limiter:
+        limiter.acquire()
+    r = (session or get_session()).get(SEARCH_URL, params={"q": keyword}, timeout=15)
+    r.raise_for_status()
+    data = r.json() or {}
+    return data.get("pairs", []) or []
 
-def query_pairs(keyword: str) -> List[Dict]:
+def query_pairs(keyword: str, session: Optional[requests.Session] = None,
+                limiter: Optional[RateLimiter] = None, cache: Optional[TTLCache] = None) -> List[Dict]:
+    key = normalize_keyword(keyword)
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
     try:
-        r = requests.get(SEARCH_URL, params={"q": keyword}, timeout=15)
-        r.raise_for_status()
-        data = r.json() or {}
-        return data.get("pairs", []) or []
+        pairs = _search(keyword, session, limiter)
     except Exception:
-        return []
+        return []  # failures are not cached
+    if cache is not None:
+        cache.set(key, pairs)
+    return pairs
+
+def open_cache(cfg: Dict) -> Optional[TTLCache]:
+    """Build the search-result cache from mapping.dexscreener.cache, or None if disabled."""
+    c = cfg.get("cache") or {}
+    if not c.get("enabled"):
+        return None
+    return TTLCache(c.get("path", "outputs/.cache/dexscreener.sqlite"),
+                    ttl_sec=c.get("ttl_sec", 600), max_entries=c.get("max_entries", 5000),
+                    namespace="dexscreener")
+
+def _usable(p: Dict, chains: List[str], min_liquidity_usd: int) -> bool:
+    chain = p.get("chainId") or p.get("chain")
+    if chains and (chain not in chains):
+        return False
+    return ((p.get("liquidity") or {}).get("usd",0) or 0) >= min_liquidity_usd
+
+def map_keywords_to_pairs(keywords: List[str], min_liquidity_usd: int, chains: List[str],
+                          max_workers: int = 8, rate_limit_per_min: int = RATE_LIMIT_PER_MIN,
+                          cache: Optional[TTLCache] = None, index: Optional[TokenIndex] = None) -> List[Dict]:
+    # one query per distinct normalized keyword; the local token index answers first,
+    # the rest is fanned out to the remote search over a bounded pool
+    queries = list(dict.fromkeys(q for q in map(normalize_keyword, keywords) if q))
+    results = {}
+    if index is not None:
+        for q in queries:
+            local = index.lookup(q, accept=lambda p: _usable(p, chains, min_liquidity_usd))
+            if local is not None:
+                results[q] = local
+    remote = [q for q in queries if q not in results]
+    if remote:
+        session = get_session(max_workers)
+        limiter = RateLimiter(rate_limit_per_min, per=60.0, burst=max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            fetched = dict(zip(remote, pool.map(lambda q: query_pairs(q, session, limiter, cache), remote)))
+        with archive.batch("dexscreener") as raw:
+            for q, pairs in fetched.items():
+                raw.add("search", pairs, q=q)
+        if index is not None:
+            index.add_pairs(p for pairs in fetched.values() for p in pairs)
+        results.update(fetched)
+
+    return [row for kw in keywords for row in pair_rows(kw, results.get(normalize_keyword(kw)) or [],
+                                                        chains, min_liquidity_usd)]
 
-def map_keywords_to_pairs(keywords: List[str], min_liquidity_usd: int, chains: List[str]) -> List[Dict]:
+def pair_rows(kw: str, pairs: List[Dict], chains: List[str], min_liquidity_usd: int) -> List[Dict]:
+    """Mapping rows for one keyword's search results; shared by live mapping and backfill."""
     out = []
-    for kw in keywords:
-        pairs = query_pairs(kw) or []
-        for p in pairs:
-            chain = p.get("chainId") or p.get("chain")
-            if chains and (chain not in chains):
-                continue
-            liq = p.get("liquidity",{}).get("usd",0) or 0
-            if liq < min_liquidity_usd:
-                continue
-            out.append({
-                "keyword": kw,
-                "chain": chain,
-                "dex_id": p.get("dexId"),
-                "pair_address": p.get("pairAddress"),
-                "base_token": p.get("baseToken",{}).get("symbol"),
-                "base_name": p.get("baseToken",{}).get("name"),
-                "fdv": p.get("fdv"),
-                "liquidity_usd": liq,
-                "price_usd": p.get("priceUsd"),
-                "url": p.get("url"),
-                "created_at": p.get("pairCreatedAt")
-            })
+    for p in pairs:
+        if not _usable(p, chains, min_liquidity_usd):
+            continue
+        out.append({
+            "keyword": kw,
+            "chain": p.get("chainId") or p.get("chain"),
+            "dex_id": p.get("dexId"),
+            "pair_address": p.get("pairAddress"),
+            "base_token": p.get("baseToken",{}).get("symbol"),
+            "base_name": p.get("baseToken",{}).get("name"),
+            "base_token_address": p.get("baseToken",{}).get("address"),
+            "fdv": p.get("fdv"),
+            "liquidity_usd": (p.get("liquidity") or {}).get("usd",0) or 0,
+            "price_usd": p.get("priceUsd"),
+            "url": p.get("url"),
+            "created_at": p.get("pairCreatedAt")
+        })
     return out
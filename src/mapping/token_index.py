@@ -0,0 +1,129 @@
+import os, json, math, sqlite3, threading, time
+from typing import List, Dict, Optional, Callable, Iterable, Set
+
+from ..metrics import metrics
+from ..items import Item
+
+def _norm(text: str) -> str:
+    return " ".join(str(text or "").split()).lower()
+
+def trigrams(text: str) -> Set[str]:
+    t = f"  {_norm(text)} "
+    return {t[i:i + 3] for i in range(len(t) - 2)} if t.strip() else set()
+
+def similarity(a: Set[str], b: Set[str]) -> float:
+    """Jaccard similarity of two trigram sets."""
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+def pumpfun_pair(it: Item) -> Optional[Dict]:
+    """A Pump.fun item as a DexScreener-shaped pair (bonding curve: no liquidity figure)."""
+    mint = it.get("mint")
+    if not mint:
+        return None
+    return {
+        "chainId": "solana",
+        "dexId": "pumpfun",
+        "pairAddress": mint,
+        "baseToken": {"address": mint, "symbol": it.get("symbol"), "name": it.get("name")},
+        "fdv": it.get("marketcap_usd"),
+        "liquidity": {},
+        "priceUsd": None,
+        "url": it.get("url"),
+        "pairCreatedAt": None,
+    }
+
+class TokenIndex:
+    """
+    Local SQLite index of the pairs seen within `max_age_sec`, keyed by base token symbol and name, with a
+    trigram inverted index for fuzzy lookup. Keywords that resolve here skip the remote search.
+    """
+
+    def __init__(self, path: str, max_age_sec: float = 3600, min_similarity: float = 0.6):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_age = max_age_sec
+        self.min_similarity = min_similarity
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS tokens (
+                key TEXT PRIMARY KEY, symbol TEXT, name TEXT, pair TEXT, updated_at REAL);
+            CREATE TABLE IF NOT EXISTS grams (gram TEXT, key TEXT, PRIMARY KEY (gram, key)) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS grams_key ON grams (key);
+        """)
+        self.db.commit()
+
+    def add_pairs(self, pairs: Iterable[Dict], now: Optional[float] = None):
+        now = now or time.time()
+        with self.lock:
+            for p in pairs:
+                base = p.get("baseToken") or {}
+                chain = p.get("chainId") or p.get("chain")
+                if not p.get("pairAddress") or not (base.get("symbol") or base.get("name")):
+                    continue
+                key = f"{chain}|{p['pairAddress']}"
+                self.db.execute("INSERT OR REPLACE INTO tokens VALUES (?,?,?,?,?)",
+                                (key, _norm(base.get("symbol")), _norm(base.get("name")),
+                                 json.dumps(p, ensure_ascii=False), now))
+                self.db.execute("DELETE FROM grams WHERE key=?", (key,))
+                self.db.executemany("INSERT OR IGNORE INTO grams VALUES (?,?)",
+                                    [(g, key) for g in trigrams(base.get("symbol")) | trigrams(base.get("name"))])
+            # a pair only refreshes when a search returns it again: drop those that fell out of results
+            cutoff = now - self.max_age
+            self.db.execute("DELETE FROM grams WHERE key IN (SELECT key FROM tokens WHERE updated_at < ?)", (cutoff,))
+            self.db.execute("DELETE FROM tokens WHERE updated_at < ?", (cutoff,))
+            self.db.commit()
+
+    def add_pumpfun(self, items: Iterable[Item], now: Optional[float] = None):
+        self.add_pairs(filter(None, (pumpfun_pair(it) for it in items if it.get("source") == "pumpfun")), now)
+
+    def lookup(self, keyword: str, accept: Callable[[Dict], bool] = lambda p: True,
+               now: Optional[float] = None) -> Optional[List[Dict]]:
+        """
+        Pairs whose symbol or name is within `min_similarity` of the keyword and that were seen
+        within `max_age_sec`, or None on a miss (nothing fresh and usable, per `accept`, matched).
+        """
+        now = now or time.time()
+        q = trigrams(keyword)
+        if not q:
+            return None
+        need = max(1, math.ceil(self.min_similarity * len(q)))  # Jaccard >= s needs >= s*|q| shared grams
+        with self.lock:
+            rows = self.db.execute(f"""
+                SELECT t.symbol, t.name, t.pair, t.updated_at FROM tokens t JOIN (
+                    SELECT key FROM grams WHERE gram IN ({",".join("?" * len(q))})
+                    GROUP BY key HAVING COUNT(*) >= ?) g ON g.key = t.key""", (*q, need)).fetchall()
+        matched = []
+        for symbol, name, raw, updated_at in rows:
+            if now - updated_at > self.max_age:
+                continue  # not pruned yet; never served
+            if max(similarity(q, trigrams(symbol)), similarity(q, trigrams(name))) < self.min_similarity:
+                continue
+            pair = json.loads(raw)
+            if accept(pair):
+                matched.append(pair)
+        if not matched:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return matched
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0.0
+        return f"token index: hits={self.hits} misses={self.misses} ({rate:.0f}% local)"
+
+    def close(self):
+        metrics.cache("token_index", self.hits, self.misses)
+        with self.lock:
+            self.db.close()
+
+def open_index(cfg: Dict) -> Optional[TokenIndex]:
+    """Build the token index from mapping.dexscreener.index, or None if disabled."""
+    c = cfg.get("index") or {}
+    if not c.get("enabled"):
+        return None
+    return TokenIndex(c.get("path", "outputs/.cache/token_index.sqlite"),
+                      max_age_sec=c.get("max_age_sec", 3600), min_similarity=c.get("min_similarity", 0.6))
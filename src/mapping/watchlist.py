@@ -0,0 +1,139 @@
+import os, sqlite3, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+
+import requests
+
+from ..ratelimit import RateLimiter
+from ..metrics import metrics
+from .dexscreener import get_session, RATE_LIMIT_PER_MIN
+
+PAIRS_URL = "https://api.dexscreener.com/latest/dex/pairs"
+BATCH_SIZE = 30  # DexScreener accepts up to 30 comma-separated addresses per call
+
+def _num(v) -> Optional[float]:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+def _pct(new: Optional[float], old: Optional[float]) -> Optional[float]:
+    if new is None or not old:
+        return None
+    return (new - old) / old * 100.0
+
+def _fetch_pairs(chain: str, addresses: List[str], session: Optional[requests.Session] = None,
+                 limiter: Optional[RateLimiter] = None) -> List[Dict]:
+    if limiter:
+        limiter.acquire()
+    try:
+        r = (session or get_session()).get(f"{PAIRS_URL}/{chain}/{','.join(addresses)}", timeout=15)
+        r.raise_for_status()
+        data = r.json() or {}
+    except Exception:
+        metrics.inc("errors_total", stage="watchlist", component=chain)
+        return []
+    return data.get("pairs") or []
+
+class Watchlist:
+    """
+    SQLite watchlist of mapped pairs. Refreshes go through the multi-pair endpoint in batches of
+    BATCH_SIZE addresses per chain; every refresh stores a snapshot, and deltas are taken
+    against the previous snapshot of the same pair.
+    """
+
+    def __init__(self, path: str, ttl_sec: float = 3 * 86400):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl = ttl_sec
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS pairs (
+                chain TEXT, pair_address TEXT, keyword TEXT, base_token TEXT, base_token_address TEXT,
+                url TEXT, added_at REAL, mapped_at REAL, PRIMARY KEY (chain, pair_address));
+            CREATE TABLE IF NOT EXISTS snapshots (
+                chain TEXT, pair_address TEXT, ts REAL, liquidity_usd REAL, fdv REAL, price_usd REAL,
+                PRIMARY KEY (chain, pair_address, ts)) WITHOUT ROWID;
+        """)
+        self.db.commit()
+
+    def add(self, mappings: List[Dict], now: Optional[float] = None):
+        """Watch every mapped pair; re-mapping an address only bumps its keyword and mapped_at."""
+        now = now or time.time()
+        rows = [(m["chain"], m["pair_address"], m.get("keyword"), m.get("base_token"), m.get("base_token_address"),
+                 m.get("url"), now, now)
+                for m in mappings if m.get("chain") and m.get("pair_address") and m.get("dex_id") != "pumpfun"]
+        with self.lock:
+            self.db.executemany("""
+                INSERT INTO pairs VALUES (?,?,?,?,?,?,?,?)
+                ON CONFLICT (chain, pair_address) DO UPDATE SET keyword=excluded.keyword, mapped_at=excluded.mapped_at
+            """, rows)
+            self.db.commit()
+
+    def prune(self, now: Optional[float] = None):
+        """Forget pairs not mapped again within ttl_sec, and snapshots older than that."""
+        cutoff = (now or time.time()) - self.ttl
+        with self.lock:
+            self.db.execute("DELETE FROM pairs WHERE mapped_at < ?", (cutoff,))
+            self.db.execute("DELETE FROM snapshots WHERE ts < ?", (cutoff,))
+            self.db.commit()
+
+    def batches(self) -> List[Tuple[str, List[str]]]:
+        by_chain: Dict[str, List[str]] = {}
+        with self.lock:
+            for chain, addr in self.db.execute("SELECT chain, pair_address FROM pairs ORDER BY chain, mapped_at DESC"):
+                by_chain.setdefault(chain, []).append(addr)
+        return [(chain, addrs[i:i + BATCH_SIZE]) for chain, addrs in by_chain.items()
+                for i in range(0, len(addrs), BATCH_SIZE)]
+
+    def refresh(self, max_workers: int = 4, rate_limit_per_min: int = RATE_LIMIT_PER_MIN,
+                now: Optional[float] = None) -> List[Dict]:
+        """Fetch every watched pair (one request per batch) and return one row per pair with deltas."""
+        now = now or time.time()
+        self.prune(now)
+        batches = self.batches()
+        if not batches:
+            return []
+        session = get_session(max_workers)
+        limiter = RateLimiter(rate_limit_per_min, per=60.0, burst=max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            fetched = list(pool.map(lambda b: _fetch_pairs(b[0], b[1], session, limiter), batches))
+        metrics.inc("watchlist_requests_total", len(batches))
+
+        out = []
+        with self.lock:
+            watched = {(c, a): (kw, sym) for c, a, kw, sym in
+                       self.db.execute("SELECT chain, pair_address, keyword, base_token FROM pairs")}
+            for p in (p for pairs in fetched for p in pairs):
+                key = (p.get("chainId"), p.get("pairAddress"))
+                if key not in watched:
+                    continue
+                liq, fdv, price = _num((p.get("liquidity") or {}).get("usd")), _num(p.get("fdv")), _num(p.get("priceUsd"))
+                prev = self.db.execute("""
+                    SELECT liquidity_usd, fdv, price_usd, ts FROM snapshots
+                    WHERE chain=? AND pair_address=? ORDER BY ts DESC LIMIT 1""", key).fetchone()
+                self.db.execute("INSERT OR REPLACE INTO snapshots VALUES (?,?,?,?,?,?)", (*key, now, liq, fdv, price))
+                prev = prev or (None, None, None, None)
+                kw, sym = watched[key]
+                out.append({
+                    "keyword": kw, "chain": key[0], "pair_address": key[1], "base_token": sym,
+                    "liquidity_usd": liq, "fdv": fdv, "price_usd": price,
+                    "liquidity_chg_pct": _pct(liq, prev[0]), "fdv_chg_pct": _pct(fdv, prev[1]),
+                    "price_chg_pct": _pct(price, prev[2]),
+                    "since_sec": now - prev[3] if prev[3] else None,
+                    "url": p.get("url"),
+                })
+            self.db.commit()
+        return out
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+def open_watchlist(cfg: Dict) -> Optional[Watchlist]:
+    """Build the watchlist from mapping.dexscreener.watchlist, or None if disabled."""
+    c = cfg.get("watchlist") or {}
+    if not c.get("enabled"):
+        return None
+    return Watchlist(c.get("path", "outputs/.state/watchlist.sqlite"), ttl_sec=c.get("ttl_sec", 3 * 86400))
@@ -0,0 +1,64 @@
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+_WORD_CH = "a-z0-9_"
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Prefix-factored alternation: matching cost grows with text length, not with the word count."""
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def walk(node) -> str:
+        alts = [re.escape(ch) + walk(child) for ch, child in sorted(node.items()) if ch]
+        optional = "" in node
+        if not alts:
+            return ""
+        if len(alts) == 1 and not optional:
+            return alts[0]
+        return "(?:" + "|".join(alts) + ")" + ("?" if optional else "")
+
+    return walk(trie)
+
+class KeywordMatcher:
+    """
+    Case-insensitive multi-keyword matcher compiled into a single trie-shaped regex. Keywords
+    match as plain substrings ("coin" in "bitcoin"); with whole_words=True ASCII keywords must
+    start and end on a word boundary, while keywords in other scripts (e.g. 中文) stay substrings.
+    """
+
+    def __init__(self, words: Iterable[str], whole_words: bool = False):
+        words = sorted({w.strip().lower() for w in words or [] if w and w.strip()})
+        self.words = words
+        ascii_words = [w for w in words if re.match(f"[{_WORD_CH}]", w)]
+        other = sorted(set(words) - set(ascii_words))
+        parts = []
+        if ascii_words:
+            trie = _trie_pattern(ascii_words)
+            parts.append(f"(?<![{_WORD_CH}])(?:{trie})(?![{_WORD_CH}])" if whole_words else f"(?:{trie})")
+        if other:
+            parts.append(f"(?:{_trie_pattern(other)})")
+        self.regex = re.compile("|".join(parts)) if parts else None
+
+    def __bool__(self) -> bool:
+        return self.regex is not None
+
+    def search(self, text: Optional[str]) -> bool:
+        return bool(self.regex and text and self.regex.search(text.lower()))
+
+    def findall(self, text: Optional[str]) -> List[str]:
+        if not (self.regex and text):
+            return []
+        return list(dict.fromkeys(self.regex.findall(text.lower())))
+
+@lru_cache(maxsize=64)
+def _compile(words: tuple, whole_words: bool) -> KeywordMatcher:
+    return KeywordMatcher(words, whole_words)
+
+def compile_matcher(words: Optional[Iterable[str]], whole_words: bool = False) -> KeywordMatcher:
+    """Compiled matcher for a keyword list, built once per process and reused by every caller."""
+    return _compile(tuple(words or ()), whole_words)
@@ -0,0 +1,178 @@
+"""
+Per-run instrumentation: stage/source durations, item counts, HTTP requests and bytes, errors and
+cache hit rates. Written at the end of a run as a Prometheus textfile (node_exporter textfile
+collector) and a JSON run summary.
+"""
+import json, os, threading, time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+PREFIX = "hotspot_"
+HELP = {
+    "stage_duration_seconds": ("gauge", "Wall time of a pipeline stage in the last run"),
+    "stage_items": ("gauge", "Items produced by a pipeline stage in the last run"),
+    "source_duration_seconds": ("gauge", "Wall time of a source fetch in the last run"),
+    "source_items": ("gauge", "Items kept from a source in the last run"),
+    "notify_duration_seconds": ("gauge", "Wall time of a notifier push in the last run"),
+    "errors_total": ("counter", "Errors by stage and component"),
+    "http_requests_total": ("counter", "HTTP requests by host and status code"),
+    "http_response_bytes_total": ("counter", "HTTP response body bytes by host"),
+    "http_request_seconds_total": ("counter", "Cumulative HTTP request time by host"),
+    "watchlist_requests_total": ("counter", "DexScreener multi-pair requests made by watchlist refreshes"),
+    "cache_requests_total": ("counter", "Cache lookups by cache and result"),
+    "cache_hit_ratio": ("gauge", "Cache hit ratio in the last run"),
+    "run_duration_seconds": ("gauge", "Wall time of the last run"),
+    "run_success": ("gauge", "1 if the last run completed, 0 if it stopped on an error"),
+    "last_run_timestamp_seconds": ("gauge", "Unix time the last run finished"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Metrics:
+    """Thread-safe registry of labelled counters and gauges."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.values: Dict[str, Dict[Labels, float]] = {}
+            self.started = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self.lock:
+            series = self.values.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self.lock:
+            self.values.setdefault(name, {})[key] = value
+
+    @contextmanager
+    def stage(self, name: str, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("errors_total", stage=name, component=name, **labels)
+            raise
+        finally:
+            self.set("stage_duration_seconds", time.perf_counter() - t0, stage=name, **labels)
+
+    def cache(self, namespace: str, hits: int, misses: int):
+        self.inc("cache_requests_total", hits, cache=namespace, result="hit")
+        self.inc("cache_requests_total", misses, cache=namespace, result="miss")
+        with self.lock:
+            series = self.values.get("cache_requests_total", {})
+            h = series.get((("cache", namespace), ("result", "hit")), 0)
+            m = series.get((("cache", namespace), ("result", "miss")), 0)
+        self.set("cache_hit_ratio", h / (h + m) if h + m else 0.0, cache=namespace)
+
+    def finish(self, ok: bool = True):
+        now = time.time()
+        self.set("run_duration_seconds", now - self.started)
+        self.set("last_run_timestamp_seconds", now)
+        self.set("run_success", 1 if ok else 0)
+
+    def textfile(self, **const) -> str:
+        """Prometheus text format; `const` labels are added to every series."""
+        extra = tuple((k, str(v)) for k, v in const.items())
+        lines = []
+        with self.lock:
+            for name in sorted(self.values):
+                kind, doc = HELP.get(name, ("untyped", name))
+                lines += [f"# HELP {PREFIX}{name} {doc}", f"# TYPE {PREFIX}{name} {kind}"]
+                for labels, v in sorted(self.values[name].items()):
+                    lbl = ",".join(f'{k}="{_escape(val)}"' for k, val in extra + labels)
+                    lines.append(f"{PREFIX}{name}{{{lbl}}} {float(v)!r}" if lbl else f"{PREFIX}{name} {float(v)!r}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict:
+        with self.lock:
+            return {
+                "started_at": datetime.fromtimestamp(self.started, timezone.utc).isoformat(),
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+                "metrics": {name: [dict(labels, value=round(v, 6)) for labels, v in sorted(series.items())]
+                            for name, series in sorted(self.values.items())},
+            }
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+metrics = Metrics()
+
+def instrument_http():
+    """Count requests, status codes, body bytes and time per host for every requests.Session (idempotent)."""
+    import requests
+    send = requests.Session.send
+    if getattr(send, "_instrumented", False):
+        return
+
+    def instrumented(self, request, **kwargs):
+        host = urlsplit(request.url).hostname or "unknown"
+        t0 = time.perf_counter()
+        try:
+            r = send(self, request, **kwargs)
+        except Exception:
+            metrics.inc("http_requests_total", host=host, status="error")
+            metrics.inc("errors_total", stage="http", component=host)
+            raise
+        finally:
+            metrics.inc("http_request_seconds_total", time.perf_counter() - t0, host=host)
+        metrics.inc("http_requests_total", host=host, status=r.status_code)
+        size = r.headers.get("Content-Length") if kwargs.get("stream") else len(r.content or b"")
+        metrics.inc("http_response_bytes_total", float(size or 0), host=host)
+        return r
+
+    instrumented._instrumented = True
+    requests.Session.send = instrumented
+
+def _atomic_write(path: str, text: str):
+    # node_exporter may read the textfile at any time: write aside, then rename
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+def _suffixed(path: str, suffix: str) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}_{suffix}{ext}"
+
+def write_run_metrics(cfg: Dict, ok: bool = True, command: Optional[str] = None) -> Optional[Dict]:
+    """
+    Write the Prometheus textfile and the JSON run summary configured under `metrics`. A stage
+    subcommand (`command`) writes its own pair of files, its series labelled with the command, so
+    it neither overwrites nor duplicates the series of a full run.
+    """
+    mcfg = cfg.get("metrics") or {}
+    if not mcfg.get("enabled"):
+        return None
+    metrics.finish(ok)
+    out_dir = cfg["run"]["out_dir"]
+    textfile = mcfg.get("textfile", f"{out_dir}/metrics/hotspot_mapper.prom")
+    summary_path = mcfg.get("summary", f"{out_dir}/run_summary.json")
+    const = {}
+    if command:
+        textfile, summary_path = _suffixed(textfile, command), _suffixed(summary_path, command)
+        const = {"command": command}
+    _atomic_write(textfile, metrics.textfile(**const))
+    summary = dict(metrics.summary(), status="success" if ok else "failed", **const)
+    _atomic_write(summary_path, json.dumps(summary, ensure_ascii=False, indent=2))
+    return summary
+
+@contextmanager
+def recorded_run(cfg: Dict, command: Optional[str] = None):
+    """One run's metrics: reset on entry and written on the way out, with run_success 0 if the run raised."""
+    metrics.reset()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        write_run_metrics(cfg, ok, command)
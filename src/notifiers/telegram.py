@@ -1,62 +1,211 @@
-import os, requests, math
-from typing import List, Dict, Optional
+import os, json, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..ratelimit import RateLimiter
 
 API_BASE = "https://api.telegram.org"
+MAX_LEN = 4096  # sendMessage limit, in UTF-16 code units
+POST_TIMEOUT = 15  # per request; also cut short to whatever is left before the deadline
+_SPECIAL = "\\_*[]()~`>#+-=|{}.!"
+_ESCAPE = str.maketrans({c: "\\" + c for c in _SPECIAL})
+
+Message = Tuple[str, str]  # (MarkdownV2 text, plain-text fallback)
+
+def escape(text: str) -> str:
+    """MarkdownV2 escaping in a single pass."""
+    return str(text).translate(_ESCAPE)
+
+def _units(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+def _pieces(md: str, plain: str, n: int):
+    # an over-long line is cut on the plain text, so no cut can separate "\" from what it escapes
+    if _units(md) <= n:
+        yield md, plain
+        return
+    start, size = 0, 0
+    for i, ch in enumerate(plain):
+        w = (2 if ch in _SPECIAL else 1) * (2 if ord(ch) > 0xFFFF else 1)
+        if size + w > n:
+            yield escape(plain[start:i]), plain[start:i]
+            start, size = i, 0
+        size += w
+    yield escape(plain[start:]), plain[start:]
 
-def _post(token: str, method: str, data: dict) -> Dict:
-    url = f"{API_BASE}/bot{token}/{method}"
-    r = requests.post(url, json=data, timeout=15)
-    try:
-        return r.json()
-    except Exception:
-        return {"status_code": r.status_code, "text": r.text}
-
-def _chunk(text: str, n: int = 3800) -> List[str]:
-    # Telegram hard limit ~4096 chars; keep a safety margin
-    return [text[i:i+n] for i in range(0, len(text), n)]
-
-def send_markdown(token: str, chat_id: str, text: str, disable_preview: bool = True) -> List[Dict]:
-    results = []
-    for chunk in _chunk(text):
-        data = {
-            "chat_id": chat_id,
-            "text": chunk,
-            "parse_mode": "MarkdownV2",
-            "disable_web_page_preview": disable_preview
-        }
-        # escape minimal set for MarkdownV2
-        safe = (chunk
-                .replace("_","\\_")
-                .replace("*","\\*")
-                .replace("[","\\[")
-                .replace("]","\\]")
-                .replace("(","\\(")
-                .replace(")","\\)")
-                .replace("~","\\~")
-                .replace("`","\\`")
-                .replace(">","\\>")
-                .replace("#","\\#")
-                .replace("+","\\+")
-                .replace("-","\\-")
-                .replace("=","\\=")
-                .replace("|","\\|")
-                .replace("{","\\{")
-                .replace("}","\\}")
-                .replace(".","\\.")
-                .replace("!","\\!"))
-        data["text"] = safe
-        results.append(_post(token, "sendMessage", data))
-    return results
-
-def send_simple_card(token: str, chat_id: str, title: str, sections: List[Dict]) -> List[Dict]:
+def chunk(lines: List[Message], n: int = MAX_LEN) -> List[Message]:
+    """Pack (markdown, plain) lines into messages of at most `n` units, measured after escaping."""
+    out, md_buf, pl_buf, size = [], [], [], 0
+    for md_line, pl_line in lines:
+        for md, pl in _pieces(md_line, pl_line, n):
+            w = _units(md) + (1 if md_buf else 0)
+            if md_buf and size + w > n:
+                out.append(("\n".join(md_buf), "\n".join(pl_buf)))
+                md_buf, pl_buf, size, w = [], [], 0, _units(md)
+            md_buf.append(md)
+            pl_buf.append(pl)
+            size += w
+    if md_buf:
+        out.append(("\n".join(md_buf), "\n".join(pl_buf)))
+    return out
+
+def render_card(title: str, sections: List[Dict]) -> List[Message]:
     """
     sections: [{header: str, items: [str, ...]}, ...]
-    Renders a Markdown-style message.
+    Bold title and headers, one bullet line per item.
     """
-    lines = [f"*{title}*"]
+    lines = [(f"*{escape(title)}*", title)]
     for sec in sections:
-        lines.append(f"\n*{sec.get('header','')}*")
-        for it in sec.get("items", []):
-            lines.append(f"- {it}")
-    text = "\n".join(lines)
-    return send_markdown(token, chat_id, text, disable_preview=False)
+        header = sec.get("header", "")
+        lines += [("", ""), (f"*{escape(header)}*", header)]
+        lines += [(escape(f"- {it}"), f"- {it}") for it in sec.get("items", [])]
+    return chunk(lines)
+
+class TelegramQueue:
+    """
+    Delivers messages to many chats from a small thread pool. Each chat gets its messages in
+    order; a global token bucket and one per chat keep the bot under Telegram's limits, a 429
+    waits out its retry_after, and a message Telegram cannot parse (400) is re-sent as plain
+    text. Whatever is still undelivered at the deadline, or after the retries, is spooled to disk
+    and goes out first on the next send.
+    """
+
+    def __init__(self, token: str, global_per_sec: float = 25, per_chat_per_min: float = 20,
+                 workers: int = 16, attempts: int = 5, deadline_sec: Optional[float] = None,
+                 spool_path: Optional[str] = None, spool_max_age_sec: float = 86400,
+                 disable_preview: bool = False):
+        self.url = f"{API_BASE}/bot{token}/sendMessage"
+        self.global_limiter = RateLimiter(global_per_sec, per=1.0, burst=max(1, int(global_per_sec)))
+        self.per_chat_per_min = per_chat_per_min
+        self.workers = workers
+        self.attempts = attempts
+        self.deadline_sec = deadline_sec
+        self.spool_path = spool_path
+        self.spool_max_age = spool_max_age_sec
+        self.disable_preview = disable_preview
+        self.queued_at: Dict[Tuple[str, str], float] = {}  # spooled messages keep their first queue time
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=workers))
+
+    def _post(self, chat_id: str, text: str, markdown: bool, timeout: float = POST_TIMEOUT) -> Tuple[Optional[int], Dict]:
+        data = {"chat_id": chat_id, "text": text, "disable_web_page_preview": self.disable_preview}
+        if markdown:
+            data["parse_mode"] = "MarkdownV2"
+        try:
+            r = self.session.post(self.url, json=data, timeout=timeout)
+        except Exception as e:
+            return None, {"ok": False, "description": f"{type(e).__name__}: {e}"}
+        try:
+            return r.status_code, r.json()
+        except Exception:
+            return r.status_code, {"ok": False, "description": r.text[:200]}
+
+    def _send_one(self, chat_id: str, msg: Message, limiter: RateLimiter, deadline: float) -> Dict:
+        markdown = True
+        body: Dict = {"ok": False, "description": "not sent"}
+        for attempt in range(self.attempts):
+            if time.monotonic() > deadline:
+                break
+            self.global_limiter.acquire()
+            limiter.acquire()
+            timeout = min(POST_TIMEOUT, max(1.0, deadline - time.monotonic()))
+            status, body = self._post(chat_id, msg[0] if markdown else msg[1], markdown, timeout)
+            if body.get("ok"):
+                return body
+            params = body.get("parameters") or {}
+            if params.get("migrate_to_chat_id"):
+                return body  # group became a supergroup: the caller switches ids
+            left = max(0.0, deadline - time.monotonic())
+            if status == 429:
+                time.sleep(min(params.get("retry_after", 1), left))
+            elif status == 400 and markdown and "parse" in str(body.get("description", "")).lower():
+                markdown = False
+            elif status is not None and 400 <= status < 500:
+                return dict(body, permanent=True)  # chat not found, bot blocked or kicked: never retried
+            else:
+                time.sleep(min(2 ** attempt, 10, left))
+        return body
+
+    def _deliver(self, chat_id: str, messages: List[Message], deadline: float):
+        limiter = RateLimiter(self.per_chat_per_min, per=60.0, burst=3)
+        results, pending = [], list(messages)
+        while pending:
+            res = self._send_one(chat_id, pending[0], limiter, deadline)
+            new_id = (res.get("parameters") or {}).get("migrate_to_chat_id")
+            if new_id:
+                chat_id = str(new_id)
+                continue
+            results.append(res)
+            if not res.get("ok"):
+                break  # keep this chat's order: the rest waits in the spool
+            pending.pop(0)
+        return chat_id, results, pending
+
+    # --- spool of undelivered messages ---
+    def _load_spool(self) -> Dict[str, List[Message]]:
+        out: Dict[str, List[Message]] = {}
+        if not self.spool_path or not os.path.exists(self.spool_path):
+            return out
+        now = time.time()
+        with open(self.spool_path, "r", encoding="utf-8") as f:
+            for line in f:
+                rec = json.loads(line)
+                if now - rec.get("queued_at", now) <= self.spool_max_age:
+                    out.setdefault(str(rec["chat_id"]), []).append((rec["text"], rec["plain"]))
+                    self.queued_at[(str(rec["chat_id"]), rec["text"])] = rec["queued_at"]
+        return out
+
+    def _save_spool(self, pending: Dict[str, List[Message]]):
+        if not self.spool_path:
+            return
+        os.makedirs(os.path.dirname(self.spool_path) or ".", exist_ok=True)
+        tmp = f"{self.spool_path}.tmp"
+        now = time.time()
+        with open(tmp, "w", encoding="utf-8") as f:
+            for chat_id, msgs in pending.items():
+                for md, plain in msgs:
+                    f.write(json.dumps({"chat_id": chat_id, "text": md, "plain": plain,
+                                        "queued_at": self.queued_at.get((chat_id, md), now)},
+                                       ensure_ascii=False) + "\n")
+        os.replace(tmp, self.spool_path)
+
+    def send(self, chat_ids: List[str], messages: List[Message]) -> Dict:
+        deadline = time.monotonic() + (self.deadline_sec or float("inf"))
+        queues = self._load_spool()
+        for c in map(str, chat_ids):
+            queues.setdefault(c, []).extend(messages)
+        summary = {"sent": 0, "pending": 0, "chats": {}}
+        spooled: Dict[str, List[Message]] = {}
+        if queues:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(queues))) as pool:
+                futures = {c: pool.submit(self._deliver, c, msgs, deadline) for c, msgs in queues.items()}
+                for c, fut in futures.items():
+                    chat_id, results, pending = fut.result()
+                    sent = sum(1 for r in results if r.get("ok"))
+                    summary["sent"] += sent
+                    summary["pending"] += len(pending)
+                    summary["chats"][c] = {"sent": sent, "pending": len(pending)}
+                    if pending:
+                        last = results[-1] if results else {"description": "deadline"}
+                        summary["chats"][c]["error"] = last.get("description")
+                        if not last.get("permanent"):
+                            spooled[chat_id] = pending
+        self._save_spool(spooled)
+        return summary
+
+def send_markdown(token: str, chat_id: str, text: str, disable_preview: bool = True, **kwargs) -> Dict:
+    """Send plain `text` (escaped here) to one chat or a list of chats."""
+    chat_ids = chat_id if isinstance(chat_id, (list, tuple)) else [chat_id]
+    messages = chunk([(escape(line), line) for line in text.split("\n")])
+    return TelegramQueue(token, disable_preview=disable_preview, **kwargs).send(chat_ids, messages)
+
+def send_simple_card(token: str, chat_id, title: str, sections: List[Dict], **kwargs) -> Dict:
+    """
+    sections: [{header: str, items: [str, ...]}, ...]
+    Renders a Markdown-style message and fans it out to `chat_id` (one id or a list).
+    """
+    chat_ids = chat_id if isinstance(chat_id, (list, tuple)) else [chat_id]
+    return TelegramQueue(token, **kwargs).send(chat_ids, render_card(title, sections))
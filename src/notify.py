@@ -0,0 +1,106 @@
+import os, time
+from typing import List, Dict, Callable
+
+from .parallel import run_parallel
+from .metrics import metrics
+from .items import Item
+
+TITLE = "Daily Overseas Hotspot → Crypto Mapping"
+
+def build_sections(agg: List[Dict], mappings: List[Dict], items: List[Item],
+                   max_hotspots: int, max_mappings: int) -> List[Dict]:
+    """Section model shared by every notifier, built once from in-memory results."""
+    hs_items = [f"{h['keyword']} | score={h['score_sum']:.2f} | hits={h['hits']} | {h['sources']}"
+                for h in agg[:max_hotspots]]
+
+    map_items = []
+    for m in mappings[:max_mappings]:
+        tok = m.get("base_token") or m.get("base_name") or "N/A"
+        liq = m.get("liquidity_usd")
+        chain = m.get("chain")
+        url = m.get("url", "")
+        map_items.append(f"{m.get('keyword')} → {tok} ({chain}) | liq=${liq} | {url}")
+
+    # pump.fun new coins (top by marketcap)
+    pf = sorted((it for it in items if it.get("source") == "pumpfun"),
+                key=lambda it: it.get("score_raw") or 0, reverse=True)
+    pf_items = [f"{it.get('title', '')} | MC=${int(it.get('score_raw') or 0)} | {it.get('url', '')}"
+                for it in pf[:max_mappings]]
+
+    return [
+        {"header": "Hotspots（聚合Top）", "items": hs_items},
+        {"header": "DexScreener 映射", "items": map_items},
+        {"header": "Pump.fun 新发币", "items": pf_items},
+    ]
+
+def _limit(sections: List[Dict], ncfg: Dict) -> List[Dict]:
+    # per-notifier item caps; the pump.fun section follows max_mappings as before
+    caps = [ncfg.get("max_hotspots", 10), ncfg.get("max_mappings", 10), ncfg.get("max_mappings", 10)]
+    return [{"header": sec["header"], "items": sec["items"][:cap] or ["暂无"]} for sec, cap in zip(sections, caps)]
+
+def _retrying(fn: Callable[[], object], retries: int, ok: Callable[[object], bool]) -> Callable[[], object]:
+    def run():
+        for attempt in range(retries + 1):
+            try:
+                res = fn()
+                if ok(res) or attempt == retries:
+                    return res
+            except Exception:
+                if attempt == retries:
+                    raise
+            time.sleep(min(2 ** attempt, 10))
+    return run
+
+def notifier_jobs(cfg: Dict, sections: List[Dict]) -> Dict[str, Callable[[], object]]:
+    ncfg = cfg.get("notify", {}) or {}
+    jobs = {}
+
+    fs = ncfg.get("feishu", {}) or {}
+    if fs.get("enabled") and fs.get("webhook", "").startswith("http"):
+        from .notifiers.feishu import send_card
+        secret = os.getenv("FEISHU_BOT_SECRET") or None
+        secs = _limit(sections, fs)
+        jobs["feishu"] = _retrying(lambda: send_card(fs["webhook"], TITLE, secs, secret=secret),
+                                   fs.get("retries", 2),
+                                   ok=lambda r: r.get("status_code", 0) < 500 and r.get("status_code") != 429)
+
+    tg = ncfg.get("telegram", {}) or {}
+    if tg.get("enabled"):
+        token = os.getenv(tg.get("token_env", "TELEGRAM_BOT_TOKEN"))
+        chat_ids = tg.get("chat_ids") or ([tg["chat_id"]] if tg.get("chat_id") else [])
+        if token and chat_ids:
+            from .notifiers.telegram import send_simple_card
+            secs = _limit(sections, tg)
+            # the delivery queue retries per message and spools what is left, so no job-level retry;
+            # its deadline leaves room for a last request, the rate limiters and the spool write
+            opts = dict(global_per_sec=tg.get("global_per_sec", 25), per_chat_per_min=tg.get("per_chat_per_min", 20),
+                        workers=tg.get("workers", 16), attempts=tg.get("retries", 2) + 3,
+                        deadline_sec=max(10, tg.get("timeout_sec", 60) - 20), spool_path=tg.get("spool_path"))
+            jobs["telegram"] = lambda: send_simple_card(token, chat_ids, TITLE, secs, **opts)
+        else:
+            print("Telegram config missing token or chat_id; skip push")
+    return jobs
+
+def dispatch(cfg: Dict, agg: List[Dict], mappings: List[Dict], items: List[Item]) -> Dict[str, object]:
+    """Build the sections once and push them to every enabled notifier in parallel."""
+    ncfg = cfg.get("notify", {}) or {}
+    enabled = [c for c in ncfg.values() if isinstance(c, dict) and c.get("enabled")]
+    if not enabled:
+        return {}
+    sections = build_sections(agg, mappings, items,
+                              max(c.get("max_hotspots", 10) for c in enabled),
+                              max(c.get("max_mappings", 10) for c in enabled))
+    jobs = notifier_jobs(cfg, sections)
+    timeouts = {name: (ncfg.get(name) or {}).get("timeout_sec", 60) for name in jobs}
+    results = {}
+    for name, res, err, dt in run_parallel(jobs, timeouts):
+        results[name] = res if err is None else {"error": err}
+        label = {"feishu": "Feishu", "telegram": "Telegram"}.get(name, name)
+        metrics.set("notify_duration_seconds", dt, notifier=name)
+        if err is not None:
+            metrics.inc("errors_total", stage="notify", component=name)
+        if err is None:
+            print(f"{label} push ({dt:.2f}s):", res)
+        else:
+            print(f"{label} push error:", err)
+    return results
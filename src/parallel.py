@@ -0,0 +1,41 @@
+import queue, threading, time
+from typing import Callable, Dict, Iterator, Optional, Tuple, Any
+
+def run_parallel(jobs: Dict[str, Callable[[], Any]], timeouts: Dict[str, float],
+                 default_timeout: Optional[float] = None) -> Iterator[Tuple[str, Any, Optional[str], float]]:
+    """
+    Run each job in its own daemon thread and yield (name, result, error, seconds) as soon as
+    each one finishes. A job that exceeds its timeout is reported with error="timeout" and its
+    late result is discarded; daemon threads never block interpreter exit.
+    """
+    q = queue.Queue()
+
+    def _worker(name: str, fn: Callable[[], Any]):
+        t0 = time.perf_counter()
+        try:
+            res, err = fn(), None
+        except Exception as e:
+            res, err = None, f"{type(e).__name__}: {e}"
+        q.put((name, res, err, time.perf_counter() - t0))
+
+    start = time.perf_counter()
+    deadlines = {}
+    for name, fn in jobs.items():
+        threading.Thread(target=_worker, args=(name, fn), name=f"job-{name}", daemon=True).start()
+        t = timeouts.get(name, default_timeout)
+        deadlines[name] = start + t if t else float("inf")
+
+    pending = set(jobs)
+    while pending:
+        wait = min(deadlines[n] for n in pending) - time.perf_counter()
+        try:
+            name, res, err, dt = q.get(timeout=None if wait == float("inf") else max(wait, 0))
+        except queue.Empty:
+            now = time.perf_counter()
+            for n in sorted(n for n in pending if deadlines[n] <= now):
+                pending.discard(n)
+                yield n, None, "timeout", now - start
+            continue
+        if name in pending:
+            pending.discard(name)
+            yield name, res, err, dt
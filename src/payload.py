@@ -0,0 +1,22 @@
+"""
+Intermediate results passed between CLI stages (fetch -> score -> map -> notify): a dict of plain
+lists/dicts, pickled and zlib-compressed behind a short magic header.
+"""
+import os, pickle, zlib
+from typing import Dict
+
+MAGIC = b"HSM1"
+
+def dump(path: str, payload: Dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), 3))
+    os.replace(tmp, path)
+
+def load(path: str) -> Dict:
+    with open(path, "rb") as f:
+        raw = f.read()
+    if raw[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a stage payload")
+    return pickle.loads(zlib.decompress(raw[len(MAGIC):]))
@@ -0,0 +1,148 @@
+"""
+Named profiles: one fetch pass, fanned out to several teams.
+
+Each entry under `profiles:` is deep-merged over the base config (dicts merge, everything else
+replaces). Sources are fetched and de-duplicated once with the base settings; scoring weights,
+keyword filters, DexScreener chain/liquidity filters, notifier targets and outputs apply per
+profile. DexScreener is queried once for the union of all profiles' keywords, with the loosest
+chain/liquidity filter, and each profile keeps the rows that pass its own. The base blacklist
+already drops items at fetch time; a profile's own blacklist drops more on top of it. Source
+watermarks (incremental mode) also come from the base config, so when any selected profile runs
+in full mode the shared fetch covers the whole lookback window.
+"""
+import copy, os
+from typing import List, Dict, Optional
+
+from .state import open_state
+from .metrics import metrics, recorded_run
+
+# per-profile state, relocated under the profile's out_dir unless the profile sets it explicitly
+PROFILE_PATHS = [("run", "incremental", "state_path"), ("velocity", "path"), ("history", "dir"),
+                 ("mapping", "dexscreener", "watchlist", "path"), ("notify", "telegram", "spool_path")]
+
+def deep_merge(base: Dict, override: Dict) -> Dict:
+    out = copy.deepcopy(base)
+    for k, v in (override or {}).items():
+        out[k] = deep_merge(out[k], v) if isinstance(v, dict) and isinstance(out.get(k), dict) else copy.deepcopy(v)
+    return out
+
+def _lookup(cfg: Dict, path) -> Optional[object]:
+    for k in path:
+        if not isinstance(cfg, dict) or k not in cfg:
+            return None
+        cfg = cfg[k]
+    return cfg
+
+def profile_config(cfg: Dict, name: str) -> Dict:
+    profiles = cfg.get("profiles") or {}
+    if name not in profiles:
+        raise SystemExit(f"unknown profile {name!r} (configured: {', '.join(profiles) or 'none'})")
+    override = profiles[name] or {}
+    base = {k: v for k, v in cfg.items() if k != "profiles"}
+    pcfg = deep_merge(base, override)
+    base_out = cfg["run"]["out_dir"]
+    out_dir = _lookup(override, ("run", "out_dir")) or os.path.join(base_out, name)
+    pcfg["run"]["out_dir"] = out_dir
+    for path in PROFILE_PATHS:
+        value = _lookup(pcfg, path)
+        if not isinstance(value, str) or _lookup(override, path) is not None:
+            continue
+        rel = os.path.relpath(value, base_out)
+        node = pcfg
+        for k in path[:-1]:
+            node = node[k]
+        node[path[-1]] = os.path.join(out_dir, rel if not rel.startswith("..") else os.path.basename(value))
+    return pcfg
+
+def _incremental(cfg: Dict) -> bool:
+    return bool((cfg["run"].get("incremental") or {}).get("enabled"))
+
+def profile_names(cfg: Dict, selected: Optional[List[str]] = None) -> List[str]:
+    return list(selected or (cfg.get("profiles") or {}))
+
+def _keep(dex: Dict, row: Dict) -> bool:
+    chains = dex.get("chains") or []
+    return (not chains or row.get("chain") in chains) and (row.get("liquidity_usd") or 0) >= dex["min_liquidity_usd"]
+
+def shared_mappings(cfg: Dict, runs: List[Dict], dex_cache=None, token_index=None):
+    """Query DexScreener once for every profile's keywords and set each run's own mappings."""
+    from .main import map_targets
+    from .mapping.dexscreener import map_keywords_to_pairs
+    active = [r for r in runs if r["cfg"]["mapping"]["dexscreener"]["enabled"]]
+    for r in runs:
+        r["mappings"] = []
+    if not active:
+        return
+    for r in active:
+        r["top"], r["keywords"], r["moved"] = map_targets(r["cfg"], r["agg"], r["state"])
+    dexes = [r["cfg"]["mapping"]["dexscreener"] for r in active]
+    chains = [] if any(not d.get("chains") for d in dexes) else sorted({c for d in dexes for c in d["chains"]})
+    keywords = list(dict.fromkeys(k for r in active for k in r["keywords"]))
+    base = cfg["mapping"]["dexscreener"]
+    rows = map_keywords_to_pairs(keywords, min_liquidity_usd=min(d["min_liquidity_usd"] for d in dexes),
+                                 chains=chains, max_workers=base.get("max_workers", 8),
+                                 rate_limit_per_min=base.get("rate_limit_per_min", 300),
+                                 cache=dex_cache, index=token_index)
+    print(f"[profiles] {len(keywords)} distinct keywords mapped for {len(active)} profiles "
+          f"({sum(len(r['keywords']) for r in active)} requested)")
+    for r in active:
+        dex, mine = r["cfg"]["mapping"]["dexscreener"], set(r["keywords"])
+        r["mappings"] = [m for m in rows if m["keyword"] in mine and _keep(dex, m)]
+        if r["moved"] is not None:
+            r["mappings"] = r["state"].merge_mappings(r["top"], r["moved"], r["mappings"])
+
+def run_profiles(cfg: Dict, names: List[str]):
+    from .ingest import fetch_all
+    from .matcher import compile_matcher
+    from .velocity import open_velocity
+    from .mapping.watchlist import open_watchlist
+    from .main import dedup_stage, score_stage, aggregate_stage, export_stage, watchlist_stage, notify_stage, \
+        open_mapping, close_all
+    pcfgs = {name: profile_config(cfg, name) for name in names}
+    fetch_cfg = cfg
+    if _incremental(cfg) and not all(map(_incremental, pcfgs.values())):
+        # source watermarks come from the base state and would hand a full-mode profile only new items
+        print("[profiles] a selected profile is not incremental: fetching the full window")
+        fetch_cfg = deep_merge(cfg, {"run": {"incremental": {"enabled": False}}})
+    with recorded_run(cfg):
+        with metrics.stage("fetch"):
+            all_items, _ = fetch_all(fetch_cfg)
+        metrics.set("stage_items", len(all_items), stage="fetch")
+        dex_cache, token_index = open_mapping(cfg)
+        if token_index is not None:
+            token_index.add_pumpfun(all_items)
+        with metrics.stage("dedup"):
+            all_items = dedup_stage(cfg, all_items)
+
+        runs = []
+        for name in names:
+            pcfg = pcfgs[name]
+            print(f"[profile {name}]")
+            blacklist = compile_matcher(pcfg.get("filters", {}).get("blacklist_any"), whole_words=True)
+            # scoring writes onto the items, so every profile gets its own copies
+            items = [it.copy() for it in all_items if not blacklist.search(it.get("title"))]
+            state = open_state(pcfg)
+            with metrics.stage("score", profile=name):
+                items_scored = score_stage(pcfg, items, state)
+            with metrics.stage("aggregate", profile=name):
+                agg = aggregate_stage(pcfg, items_scored, open_velocity(pcfg))
+            metrics.set("stage_items", len(agg), stage="aggregate", profile=name)
+            runs.append({"name": name, "cfg": pcfg, "state": state, "items": items_scored, "agg": agg})
+
+        with metrics.stage("map"):
+            shared_mappings(cfg, runs, dex_cache, token_index)
+        close_all(dex_cache, token_index)
+
+        for r in runs:
+            pcfg, name = r["cfg"], r["name"]
+            print(f"[profile {name}] {len(r['agg'])} hotspots, {len(r['mappings'])} mappings")
+            watchlist = open_watchlist(pcfg["mapping"]["dexscreener"]) if pcfg["mapping"]["dexscreener"]["enabled"] else None
+            if watchlist is not None:
+                with metrics.stage("watchlist", profile=name):
+                    watchlist_stage(pcfg, watchlist, r["mappings"])
+                watchlist.close()
+            with metrics.stage("export", profile=name):
+                export_stage(pcfg, r["items"], r["agg"], r["mappings"])
+            close_all(r["state"])
+            with metrics.stage("notify", profile=name):
+                notify_stage(pcfg, r["agg"], r["mappings"], r["items"])
@@ -0,0 +1,23 @@
+import threading, time
+
+class RateLimiter:
+    """Thread-safe token bucket: at most `rate` acquisitions per `per` seconds, bursts up to `burst`."""
+
+    def __init__(self, rate: float, per: float = 60.0, burst: int = 1):
+        self.interval = per / float(rate)
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) / self.interval)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) * self.interval
+            time.sleep(wait)
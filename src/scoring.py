@@ -1,57 +1,80 @@
 from datetime import datetime, timezone
-from typing import List, Dict
+from typing import List, Dict, Optional
 import math
 
-def score_items(items: List[Dict], weights: Dict) -> List[Dict]:
+from .keywords import build_index
+from .matcher import compile_matcher
+from .items import Item
+
+def iso_epoch(ts: Optional[str]) -> Optional[float]:
+    """UTC epoch seconds of an ISO-8601 timestamp (naive ones are UTC), or None when unparsable."""
+    try:
+        dt = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+    except Exception:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+def score_items(items: List[Item], weights: Dict, now: Optional[datetime] = None) -> List[Item]:
+    """Sets `score` on each item (in place) and returns the items."""
     # Normalize by source
     # twitter: likes/retweets; reddit: upvotes; google_trends: value
     half_life = weights.get("recency_hours_half_life", 24)
+    now = (now or datetime.now(timezone.utc)).timestamp()
     def recency_boost(ts: str) -> float:
-        try:
-            dt = datetime.fromisoformat(ts.replace("Z","+00:00"))
-        except Exception:
+        t = iso_epoch(ts)
+        if t is None:
             return 1.0
-        hours = (datetime.now(timezone.utc) - dt).total_seconds() / 3600.0
+        hours = (now - t) / 3600.0
         return 2 ** (-hours / half_life)  # newer → closer to 1, older → decay
 
-    enriched = []
     for it in items:
         src = it.get("source")
         base = 0.0
         if src == "twitter":
-            m = it.get("meta",{})
-            base = m.get("likes",0)*weights.get("twitter_like_scale",0.001) + m.get("retweets",0)*weights.get("twitter_retweet_scale",0.002)
+            base = (it.get("likes") or 0)*weights.get("twitter_like_scale",0.001) + (it.get("retweets") or 0)*weights.get("twitter_retweet_scale",0.002)
         elif src == "reddit":
             base = it.get("score_raw",0)*weights.get("reddit_upvote_scale",0.002)
         elif src == "google_trends":
             base = (it.get("score_raw",0) or 0)/100.0
         else:
             base = it.get("score_raw",0)/100.0
-        s = base * recency_boost(it.get("timestamp",""))
-        it2 = dict(it)
-        it2["score"] = s
-        enriched.append(it2)
-    return enriched
+        it["score"] = base * recency_boost(it.get("timestamp",""))
+    return items
 
-def aggregate_by_keyword(items: List[Dict], whitelist: List[str]):
-    # very naive keyword picking: keep phrases with any whitelist token
-    buckets = {}
-    for it in items:
-        title = (it.get("title") or "").lower()
-        matched = [w for w in whitelist if w in title]
-        if not matched:
-            continue
-        key = title
-        buckets.setdefault(key, []).append(it)
+def aggregate_by_keyword(items: List[Item], whitelist: List[str], min_hits: int = 1, max_ngram: int = 2,
+                         whole_words: bool = False, velocity=None):
+    # items must mention a whitelist token; they are then bucketed by every extracted term
+    # (n-grams, cashtags, hashtags) via an inverted index, so sources resonate on shared terms
+    wl = compile_matcher(whitelist, whole_words)
+    kept = [it for it in items if wl.search(it.get("title"))]
+    index, tags = build_index((it.get("title") for it in kept), max_ngram=max_ngram)
+    gate = {w.lower() for w in whitelist}  # the filter words themselves carry no signal
     agg = []
-    for key, arr in buckets.items():
+    for term, pos in index.items():
+        if term in gate or (len(pos) < min_hits and term not in tags):
+            continue
+        arr = [kept[i] for i in pos]
         score_sum = sum(x.get("score",0) for x in arr)
-        sources = sorted({x.get("source") for x in arr})
+        sources = sorted({s for x in arr for s in (x.get("dup_sources") or [x.get("source")])})
         agg.append({
-            "keyword": key,
+            "keyword": term,
             "hits": len(arr),
             "sources": ",".join(sources),
             "score_sum": score_sum
         })
+    if velocity is not None:
+        # cross-run mention rates: terms whose rate is rising rank above their snapshot score
+        velocity.observe(kept, index)
+        stats = velocity.stats([a["keyword"] for a in agg])
+        for a in agg:
+            st = stats.get(a["keyword"])
+            a["rate"] = round(st["rate"], 3)
+            a["velocity"] = round(st["velocity"], 3)
+            a["acceleration"] = round(st["acceleration"], 3)
+            a["rank_score"] = a["score_sum"] * velocity.boost(st)
+        agg.sort(key=lambda x: (x["rank_score"], x["hits"]), reverse=True)
+        return agg
     agg.sort(key=lambda x: (x["score_sum"], x["hits"]), reverse=True)
     return agg
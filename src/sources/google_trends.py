@@ -1,45 +1,149 @@
-import time
+import queue, random, re, threading, time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from pytrends.request import TrendReq
 
-def fetch_google_trends(regions: List[str], kw_seed: List[str], top_n: int) -> List[Dict]:
-    pytrends = TrendReq(hl="en-US", tz=360)  # US English, UTC-6 offset for example
-    results = []
+from ..cache import TTLCache
+from ..archive import archive
+from ..items import Item
+
+MAX_TERMS = 5  # pytrends accepts at most 5 terms per payload
+_UNIT_SEC = {"H": 3600, "d": 86400, "m": 30 * 86400, "y": 365 * 86400}
+
+_clients: "queue.LifoQueue[TrendReq]" = queue.LifoQueue()
+
+def _borrow() -> TrendReq:
+    # TrendReq is not thread-safe: each worker borrows its own session; sessions stay warm in the pool
+    try:
+        return _clients.get_nowait()
+    except queue.Empty:
+        return TrendReq(hl="en-US", tz=360)  # US English, UTC-6 offset for example
+
+class _Backoff:
+    """Shared adaptive delay: doubles (with full jitter) on rate limiting, decays on success."""
+
+    def __init__(self, base: float = 1.0, max_delay: float = 60.0):
+        self.base, self.max_delay = base, max_delay
+        self.delay = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            d = self.delay
+        if d:
+            time.sleep(random.uniform(0, d))
+
+    def throttled(self):
+        with self.lock:
+            self.delay = min(self.max_delay, max(self.base, self.delay * 2))
+
+    def ok(self):
+        with self.lock:
+            self.delay = self.delay / 2 if self.delay > self.base / 4 else 0.0
+
+def _rate_limited(e: Exception) -> bool:
+    status = getattr(getattr(e, "response", None), "status_code", None)
+    return status == 429 or type(e).__name__ == "TooManyRequestsError" or "429" in str(e)
+
+def timeframe_ttl(timeframe: str) -> int:
+    """Seconds a related-queries result stays valid: the span of the timeframe ("now 1-d" -> 1 day)."""
+    m = re.search(r"(\d+)-([Hdmy])", timeframe or "")
+    if m:
+        return int(m.group(1)) * _UNIT_SEC[m.group(2)]
+    return 7 * 86400 if re.match(r"\d{4}-\d{2}-\d{2} \d{4}-\d{2}-\d{2}", timeframe or "") else 3600
+
+def open_trends_cache(cfg: Dict) -> Optional[TTLCache]:
+    c = cfg.get("cache") or {}
+    if not c.get("enabled"):
+        return None
+    return TTLCache(c.get("path", "outputs/.cache/google_trends.sqlite"),
+                    ttl_sec=c.get("ttl_sec") or timeframe_ttl(cfg.get("timeframe", "now 1-d")),
+                    max_entries=c.get("max_entries", 2000), namespace="google_trends")
+
+def _related(region: str, chunk: List[str], timeframe: str, backoff: _Backoff, retries: int) -> Dict[str, Dict]:
+    """related_queries for one region x chunk, as {seed: {"top": [[query, value], ...], "rising": [...]}}."""
+    client = _borrow()
+    try:
+        for attempt in range(retries + 1):
+            backoff.wait()
+            try:
+                client.build_payload(chunk, timeframe=timeframe, geo=region)
+                trending = client.related_queries() or {}
+                backoff.ok()
+                break
+            except Exception as e:
+                if not _rate_limited(e) or attempt == retries:
+                    raise
+                backoff.throttled()
+        out = {}
+        for kw in chunk:
+            rq = trending.get(kw) or {}
+            out[kw] = {}
+            for seg in ("top", "rising"):
+                df = rq.get(seg)
+                if df is None:
+                    continue
+                rows = []
+                for _, row in df.iterrows():
+                    value = row.get("value", 0)
+                    rows.append([str(row.get("query", "")).strip(), int(value) if value == value else 0])
+                out[kw][seg] = rows
+        return out
+    finally:
+        _clients.put(client)
+
+def fetch_google_trends(regions: List[str], kw_seed: List[str], top_n: int, timeframe: str = "now 1-d",
+                        max_workers: int = 2, retries: int = 3, cache: Optional[TTLCache] = None) -> List[Item]:
+    # per (region, seed) related queries: cache hits first, the rest in valid <=5-term payloads
+    related: Dict[Tuple[str, str], Dict] = {}
+    jobs = []
     for region in regions:
-        try:
-            pytrends.build_payload(kw_seed, timeframe="now 1-d", geo=region)
-            trending = pytrends.related_queries()
-            if not trending:
+        missing = []
+        for kw in kw_seed:
+            hit = cache.get(f"{region}|{kw}|{timeframe}") if cache is not None else None
+            if hit is not None:
+                related[(region, kw)] = hit
+            else:
+                missing.append(kw)
+        jobs += [(region, missing[i:i + MAX_TERMS]) for i in range(0, len(missing), MAX_TERMS)]
+
+    backoff = _Backoff()
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(_related, region, chunk, timeframe, backoff, retries): (region, chunk)
+                   for region, chunk in jobs}
+        for fut, (region, chunk) in futures.items():
+            try:
+                res = fut.result()
+            except Exception as e:
+                errors.setdefault(region, e)
                 continue
-            for kw in kw_seed:
-                rq = trending.get(kw, {})
-                for seg in ("top", "rising"):
-                    df = rq.get(seg)
-                    if df is None:
-                        continue
-                    for _, row in df.head(top_n).iterrows():
-                        phrase = str(row.get("query", "")).strip()
-                        value = int(row.get("value", 0)) if not (row.get("value") != row.get("value")) else 0
-                        if phrase:
-                            results.append({
-                                "source": "google_trends",
-                                "region": region,
-                                "title": phrase,
-                                "url": f"https://trends.google.com/trends/explore?geo={region}&q={phrase}",
-                                "score_raw": value,
-                                "timestamp": datetime.utcnow().isoformat() + "Z",
-                                "meta": {"segment": seg, "seed_kw": kw}
-                            })
-            time.sleep(1)
-        except Exception as e:
-            results.append({
-                "source": "google_trends",
-                "region": region,
-                "title": f"[error] {e}",
-                "url": "",
-                "score_raw": 0,
-                "timestamp": datetime.utcnow().isoformat() + "Z",
-                "meta": {"segment": "error"}
-            })
+            for kw, segs in res.items():
+                related[(region, kw)] = segs
+                if cache is not None:
+                    cache.set(f"{region}|{kw}|{timeframe}", segs)
+
+    with archive.batch("google_trends") as raw:
+        for (region, kw), segs in related.items():
+            raw.add("related", segs, region=region, kw=kw, timeframe=timeframe)
+    return build_items(related, regions, kw_seed, top_n, datetime.utcnow().isoformat() + "Z", errors)
+
+def build_items(related: Dict[Tuple[str, str], Dict], regions: List[str], kw_seed: List[str], top_n: int,
+                now: str, errors: Optional[Dict[str, Exception]] = None) -> List[Item]:
+    """Items from per (region, seed) related queries; shared by live fetch and backfill."""
+    errors = errors or {}
+    results = []
+    for region in regions:
+        if region in errors:
+            results.append(Item("google_trends", f"[error] {errors[region]}", "", 0, now,
+                                region=region, segment="error"))
+        for kw in kw_seed:
+            segs = related.get((region, kw)) or {}
+            for seg in ("top", "rising"):
+                for phrase, value in (segs.get(seg) or [])[:top_n]:
+                    if phrase:
+                        results.append(Item("google_trends", phrase,
+                                            f"https://trends.google.com/trends/explore?geo={region}&q={phrase}",
+                                            value, now, region=region, segment=seg, seed_kw=kw))
     return results
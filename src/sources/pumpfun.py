@@ -1,70 +1,143 @@
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+
+from ..matcher import compile_matcher
+from ..archive import archive
+from ..items import Item
 
 API = "https://frontend-api.pump.fun/projects"
+SORTS = ("createdAt", "marketCap", "holders")
+
+_session = requests.Session()  # keep-alive connection reused across calls
 
 def _get(url: str, params: dict) -> Optional[dict]:
     try:
-        r = requests.get(url, params=params, timeout=15)
+        r = _session.get(url, params=params, timeout=15)
         r.raise_for_status()
         return r.json()
     except Exception:
         return None
 
-def fetch_pumpfun_recent(limit: int = 100, kw_any: Optional[List[str]] = None) -> List[Dict]:
+def _projects(sort: str, offset: int, limit: int) -> Optional[List[Dict]]:
+    """One page of projects, or None when the request failed."""
+    data = _get(API, {"offset": offset, "limit": limit, "sort": sort})
+    if data is None:
+        return None
+    projects = (data.get("projects") or data.get("data")) if isinstance(data, dict) else data
+    return projects if isinstance(projects, list) else []
+
+def _created_ms(p: Dict) -> Optional[float]:
+    ts = p.get("createdAt") or p.get("created_at")
+    if isinstance(ts, (int, float)):
+        return float(ts if ts > 1e12 else ts * 1000)
+    if isinstance(ts, str):
+        try:
+            dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp() * 1000
+    return None
+
+def _walk(sort: str, limit: int, max_pages: int, watermark_ms: Optional[float]) -> Tuple[List[Dict], bool, bool]:
     """
-    Fetch recent Pump.fun projects (unofficial endpoint). We query several sorts to improve coverage.
+    Page through one sort order; the createdAt walk stops once it reaches the watermark.
+    Returns (projects, ok, reached): ok when no page failed, reached when the walk got to the end
+    of the listing or to the watermark rather than stopping at max_pages.
+    """
+    out = []
+    for page in range(max_pages):
+        projects = _projects(sort, page * limit, limit)
+        if projects is None:
+            return out, False, False
+        out.extend(projects)
+        if len(projects) < limit:
+            return out, True, True
+        if sort == "createdAt" and watermark_ms is not None:
+            created = [c for c in map(_created_ms, projects) if c is not None]
+            if created and min(created) <= watermark_ms:
+                return out, True, True
+    return out, True, watermark_ms is None
+
+def _record(p: Dict, title: str) -> Item:
+    ts = p.get("createdAt") or p.get("created_at")
+    # normalize timestamp
+    if isinstance(ts, (int, float)):
+        created = datetime.fromtimestamp(ts/1000 if ts>1e12 else ts, tz=timezone.utc).isoformat()
+    elif isinstance(ts, str):
+        created = ts
+    else:
+        created = datetime.now(timezone.utc).isoformat()
+    return Item("pumpfun", title,
+                f"https://pump.fun/coin/{p.get('mint')}" if p.get("mint") else "https://pump.fun",
+                int(p.get("marketCapUsd") or p.get("marketCap") or 0), created,
+                mint=p.get("mint"), name=p.get("name"), symbol=p.get("symbol"),
+                marketcap_usd=p.get("marketCapUsd") or p.get("marketCap"), holders=p.get("holders"),
+                raydium_pool=p.get("raydiumPool"))
+
+def crawl_pumpfun(limit: int = 100, kw_any: Optional[List[str]] = None, whole_words: bool = False,
+                  max_pages: int = 1, watermark_ms: Optional[float] = None) -> Tuple[List[Item], Optional[float]]:
     """
+    Page through every sort order concurrently (up to max_pages each). The createdAt walk stops
+    at `watermark_ms` (newest createdAt from the previous run) and launches at or before it are
+    skipped. Returns (items, new watermark).
+
+    The watermark only advances off a createdAt walk that succeeded and returned launches. A
+    walk that stops at max_pages before the watermark (more launches since the last run than it
+    pages through) still advances it, and the launches it could not reach are logged as a gap.
+    """
+    with ThreadPoolExecutor(max_workers=len(SORTS)) as pool:
+        results = list(pool.map(lambda s: _walk(s, limit, max_pages, watermark_ms), SORTS))
+    walks = [projects for projects, _, _ in results]
+    with archive.batch("pumpfun") as raw:
+        for sort, projects in zip(SORTS, walks):
+            raw.add("projects", projects, sort=sort)
+    items, newest = parse_projects(zip(SORTS, walks), kw_any, whole_words, watermark_ms)
+    projects, ok, reached = results[SORTS.index("createdAt")]
+    if not (ok and projects):
+        print("[pumpfun] createdAt walk failed or empty; watermark unchanged")
+        return items, watermark_ms
+    if not reached:
+        oldest = min((c for c in map(_created_ms, projects) if c is not None), default=None)
+        gap = f"{(oldest - watermark_ms) / 60000:.0f} min" if oldest is not None else "unknown span"
+        print(f"[pumpfun] createdAt walk stopped at {max_pages} pages before the watermark; "
+              f"launches in a {gap} gap were skipped (raise sources.pumpfun.max_pages or run more often)")
+    return items, newest
+
+def parse_projects(walks, kw_any: Optional[List[str]] = None, whole_words: bool = False,
+                   watermark_ms: Optional[float] = None) -> Tuple[List[Item], Optional[float]]:
+    """(sort, projects) walks -> (items by marketcap, newest createdAt of the createdAt walk); shared by live fetch and backfill."""
+    kw = compile_matcher(kw_any, whole_words)
+    newest = watermark_ms
+    seen = set()
     results = []
-    for sort in ("createdAt", "marketCap", "holders"):
-        data = _get(API, {"offset": 0, "limit": limit, "sort": sort})
-        if not data or not isinstance(data, dict):
-            continue
-        projects = data.get("projects") or data.get("data") or data
-        if not isinstance(projects, list):
-            continue
+    for sort, projects in walks:
         for p in projects:
+            mint = p.get("mint")
+            if not mint or mint in seen:
+                continue
+            created = _created_ms(p)
+            # only the createdAt walk sees every launch: other orders must not move the watermark
+            if sort == "createdAt" and created is not None and (newest is None or created > newest):
+                newest = created
+            if sort == "createdAt" and watermark_ms is not None and created is not None and created <= watermark_ms:
+                continue  # launch already ingested by an earlier run
+            seen.add(mint)
             name = str(p.get("name") or "").strip()
             symbol = str(p.get("symbol") or "").strip()
             title = f"{name} ({symbol})".strip() or symbol or name
-            title_l = title.lower()
-            if kw_any:
-                if not any(k.lower() in title_l for k in kw_any):
-                    # also try in description if present
-                    desc = (p.get("description") or "").lower()
-                    if not any(k.lower() in desc for k in kw_any):
-                        continue
-            ts = p.get("createdAt") or p.get("created_at")
-            # normalize timestamp
-            if isinstance(ts, (int, float)):
-                created = datetime.fromtimestamp(ts/1000 if ts>1e12 else ts, tz=timezone.utc).isoformat()
-            elif isinstance(ts, str):
-                created = ts
-            else:
-                created = datetime.now(timezone.utc).isoformat()
-            results.append({
-                "source": "pumpfun",
-                "title": title,
-                "url": f"https://pump.fun/coin/{p.get('mint')}" if p.get("mint") else "https://pump.fun",
-                "score_raw": int(p.get("marketCapUsd") or p.get("marketCap") or 0),
-                "timestamp": created,
-                "meta": {
-                    "mint": p.get("mint"),
-                    "marketcap_usd": p.get("marketCapUsd") or p.get("marketCap"),
-                    "holders": p.get("holders"),
-                    "raydium_pool": p.get("raydiumPool"),
-                }
-            })
-    # de-dup by mint
-    seen = set()
-    uniq = []
-    for x in results:
-        m = x["meta"].get("mint")
-        if not m or m in seen:
-            continue
-        seen.add(m)
-        uniq.append(x)
+            # keyword filter on title, falling back to description
+            if kw and not (kw.search(title) or kw.search(p.get("description"))):
+                continue
+            results.append(_record(p, title))
     # sort by marketcap (desc)
-    uniq.sort(key=lambda x: x.get("score_raw", 0) or 0, reverse=True)
-    return uniq
+    results.sort(key=lambda x: x.get("score_raw", 0) or 0, reverse=True)
+    return results, newest
+
+def fetch_pumpfun_recent(limit: int = 100, kw_any: Optional[List[str]] = None, whole_words: bool = False,
+                         max_pages: int = 1, watermark_ms: Optional[float] = None) -> List[Item]:
+    """
+    Fetch recent Pump.fun projects (unofficial endpoint). We query several sorts to improve coverage.
+    """
+    return crawl_pumpfun(limit, kw_any, whole_words, max_pages, watermark_ms)[0]
@@ -1,44 +1,73 @@
 import os
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
 import praw
 
-def fetch_reddit(subreddits: List[str], min_upvotes: int, lookback_hours: int, top_n: int) -> List[Dict]:
+from ..archive import archive
+from ..items import Item, error_item
+
+@lru_cache(maxsize=4)
+def _client(client_id: str, client_secret: str, user_agent: str) -> praw.Reddit:
+    # authenticated client reused across calls (and daemon ticks)
+    return praw.Reddit(client_id=client_id, client_secret=client_secret, user_agent=user_agent)
+
+def parse_post(p: Dict) -> Item:
+    """A post (the fields read off PRAW, as archived) as an item."""
+    return Item("reddit", p["title"], f"https://www.reddit.com{p['permalink']}", p["score"],
+                datetime.utcfromtimestamp(p["created_utc"]).isoformat() + "Z",
+                subreddit=p["subreddit"], num_comments=p["num_comments"])
+
+def crawl_reddit(subreddits: List[str], min_upvotes: int, lookback_hours: int, top_n: int,
+                 after_fullname: Optional[str] = None, settle_hours: float = 6) -> Tuple[List[Item], Optional[str]]:
+    """
+    Walk one combined `a+b+c` listing of new posts, newest first, stopping at the lookback
+    boundary or at `after_fullname` (the watermark of the previous run). Returns (items, new watermark).
+    The watermark only advances when the walk got there; after an error or a walk cut off by the
+    listing limit the old one is returned, so the posts in between are walked again next run.
+
+    Posts are first seen minutes after posting, well below `min_upvotes`, so the watermark only
+    moves to the newest post older than `settle_hours`: younger posts are walked again, and get
+    their upvote check again, on every run until they settle.
+    """
     client_id = os.getenv("REDDIT_CLIENT_ID")
     client_secret = os.getenv("REDDIT_CLIENT_SECRET")
     user_agent = os.getenv("REDDIT_USER_AGENT", "hotspot-mapper/0.1")
     results = []
     if not (client_id and client_secret):
-        return results  # silently skip if not configured
+        return results, after_fullname  # silently skip if not configured
 
-    reddit = praw.Reddit(client_id=client_id, client_secret=client_secret, user_agent=user_agent)
-    since = datetime.now(timezone.utc) - timedelta(hours=lookback_hours)
-
-    for sub in subreddits:
-        try:
-            subreddit = reddit.subreddit(sub)
-            for post in subreddit.hot(limit=top_n*5):
-                if post.created_utc and datetime.fromtimestamp(post.created_utc, tz=timezone.utc) < since:
-                    continue
+    reddit = _client(client_id, client_secret, user_agent)
+    now = datetime.now(timezone.utc)
+    since = (now - timedelta(hours=lookback_hours)).timestamp()
+    settled = (now - timedelta(hours=settle_hours)).timestamp()
+    newest, complete, n = None, False, 0
+    limit = top_n*5*len(subreddits)
+    try:
+        listing = reddit.subreddit("+".join(subreddits)).new(limit=limit)
+        with archive.batch("reddit") as raw:
+            for post in listing:
+                if post.fullname == after_fullname:
+                    complete = True  # everything from here on was seen by the previous run
+                    break
+                if post.created_utc and post.created_utc < since:
+                    complete = True  # `new` is newest-first: the rest is outside the window
+                    break
+                n += 1
+                if newest is None and post.created_utc and post.created_utc <= settled:
+                    newest = post.fullname
+                p = {"fullname": post.fullname, "subreddit": post.subreddit.display_name, "title": post.title,
+                     "permalink": post.permalink, "score": post.score, "num_comments": post.num_comments,
+                     "created_utc": post.created_utc}
+                raw.add("post", p)
                 if post.score < min_upvotes:
                     continue
-                results.append({
-                    "source": "reddit",
-                    "subreddit": sub,
-                    "title": post.title,
-                    "url": f"https://www.reddit.com{post.permalink}",
-                    "score_raw": post.score,
-                    "timestamp": datetime.utcfromtimestamp(post.created_utc).isoformat() + "Z",
-                    "meta": {"num_comments": post.num_comments}
-                })
-        except Exception as e:
-            results.append({
-                "source": "reddit",
-                "subreddit": sub,
-                "title": f"[error] {e}",
-                "url": "",
-                "score_raw": 0,
-                "timestamp": datetime.utcnow().isoformat() + "Z",
-                "meta": {}
-            })
-    return results
+                results.append(parse_post(p))
+        complete = complete or n < limit  # a short listing ran out of posts
+    except Exception as e:
+        results.append(error_item("reddit", e, subreddit="+".join(subreddits)))
+        complete = False
+    return results, (newest if complete and newest else after_fullname)
+
+def fetch_reddit(subreddits: List[str], min_upvotes: int, lookback_hours: int, top_n: int) -> List[Item]:
+    return crawl_reddit(subreddits, min_upvotes, lookback_hours, top_n)[0]
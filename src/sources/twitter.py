@@ -1,44 +1,103 @@
-import subprocess, json, shlex
+import subprocess, json, shlex, heapq, tempfile, threading
+from contextlib import closing
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional
 
-def _run(cmd: str) -> str:
-    p = subprocess.run(shlex.split(cmd), capture_output=True, text=True)
-    if p.returncode != 0:
-        raise RuntimeError(p.stderr.strip())
-    return p.stdout
+from ..matcher import compile_matcher
+from ..archive import archive
+from ..items import Item, error_item
+from ..metrics import metrics
 
-def fetch_twitter(kw_any: List[str], lookback_hours: int, max_results: int, top_n: int) -> List[Dict]:
+def _stream(cmd: str, time_budget_sec: Optional[float] = None) -> Iterator[str]:
+    """
+    Yield the command's stdout line by line as it is produced. The process is terminated when
+    the consumer stops early or the time budget runs out; a non-zero exit raises RuntimeError.
+    """
+    with tempfile.TemporaryFile(mode="w+") as err:
+        p = subprocess.Popen(shlex.split(cmd), stdout=subprocess.PIPE, stderr=err, text=True, bufsize=1)
+        expired = threading.Event()
+
+        def _expire():
+            expired.set()
+            p.terminate()
+
+        timer = threading.Timer(time_budget_sec, _expire) if time_budget_sec else None
+        if timer:
+            timer.start()
+        try:
+            for line in p.stdout:
+                yield line
+        finally:
+            if timer:
+                timer.cancel()
+            if p.poll() is None:
+                p.terminate()
+            try:
+                p.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                p.kill()
+                p.wait()
+            p.stdout.close()
+        if p.returncode != 0 and not expired.is_set():
+            err.seek(0)
+            raise RuntimeError(err.read().strip())
+
+def parse_tweet(obj: Dict) -> Item:
+    """One snscrape tweet object as an item."""
+    likes, retweets = obj.get("likeCount",0), obj.get("retweetCount",0)
+    return Item("twitter", (obj.get("content") or "")[:200], obj.get("url",""),
+                (likes or 0) + 2*(retweets or 0), obj.get("date",""), likes=likes, retweets=retweets)
+
+def iter_twitter(kw_any: List[str], lookback_hours: int, max_results: int,
+                 whole_words: bool = False, time_budget_sec: Optional[float] = None) -> Iterator[Item]:
+    """Stream parsed tweet items from snscrape as they arrive (stops after max_results or the time budget)."""
     # Build query: (kw1 OR kw2 ...) lang:en -lang:zh -filter:replies
     since = (datetime.now(timezone.utc) - timedelta(hours=lookback_hours)).strftime("%Y-%m-%d")
     ors = " OR ".join([shlex.quote(k) for k in kw_any])
     query = f"({ors}) lang:en -lang:zh since:{since}"
     cmd = f"snscrape --jsonl --max-results {max_results} twitter-search {shlex.quote(query)}"
+    # search also matches handles/links; keep only tweets whose text has a keyword
+    kw = compile_matcher(kw_any, whole_words)
+    n = 0
+    with archive.batch("twitter") as raw, closing(_stream(cmd, time_budget_sec)) as lines:
+        for line in lines:
+            try:
+                obj = json.loads(line)
+            except Exception:
+                continue
+            n += 1
+            raw.add("tweet", obj, query=query)
+            if kw and not kw.search(obj.get("content")):
+                continue
+            yield parse_tweet(obj)
+            if n >= max_results:
+                break
+
+def _push_top(heap: List, items: Iterator[Item], top_n: int):
+    for seq, it in enumerate(items):
+        entry = (it["score_raw"], -seq, it)  # on ties the earlier tweet wins, like a stable sort
+        if len(heap) < top_n:
+            heapq.heappush(heap, entry)
+        else:
+            heapq.heappushpop(heap, entry)
+
+def fetch_twitter(kw_any: List[str], lookback_hours: int, max_results: int, top_n: int,
+                  whole_words: bool = False, time_budget_sec: Optional[float] = None) -> List[Item]:
+    # Keep only the current top_n by score_raw in a min-heap while streaming
+    heap = []
     try:
-        out = _run(cmd)
+        _push_top(heap, iter_twitter(kw_any, lookback_hours, max_results, whole_words, time_budget_sec), top_n)
     except Exception as e:
-        return [{
-            "source": "twitter",
-            "title": f"[error] {e}",
-            "url": "",
-            "score_raw": 0,
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "meta": {}
-        }]
-    results = []
-    for line in out.splitlines():
-        try:
-            obj = json.loads(line)
-            results.append({
-                "source": "twitter",
-                "title": obj.get("content","")[:200],
-                "url": obj.get("url",""),
-                "score_raw": (obj.get("likeCount",0) or 0) + 2*(obj.get("retweetCount",0) or 0),
-                "timestamp": obj.get("date",""),
-                "meta": {"likes": obj.get("likeCount",0), "retweets": obj.get("retweetCount",0)}
-            })
-        except Exception:
-            continue
-    # Keep top_n by score_raw
-    results.sort(key=lambda x: x.get("score_raw",0), reverse=True)
-    return results[:top_n]
+        if not heap:
+            return [error_item("twitter", e)]
+        # partial results are kept, but the failure still shows up in the log and errors_total
+        print(f"[twitter] snscrape failed after {len(heap)} kept tweets: {e}")
+        metrics.inc("errors_total", stage="fetch", component="twitter")
+    return [it for _, _, it in sorted(heap, key=lambda e: (-e[0], -e[1]))]
+
+def parse_tweets(objs: Iterator[Dict], kw_any: List[str], top_n: int, whole_words: bool = False) -> List[Item]:
+    """Archived snscrape objects through the same keyword filter and top_n cut as a live fetch."""
+    kw = compile_matcher(kw_any, whole_words)
+    heap = []
+    _push_top(heap, (parse_tweet(o) for o in objs if not kw or kw.search(o.get("content"))), top_n)
+    return [it for _, _, it in sorted(heap, key=lambda e: (-e[0], -e[1]))]
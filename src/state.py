@@ -0,0 +1,129 @@
+import os, json, hashlib, sqlite3, time
+from typing import List, Dict, Optional, Set, Tuple
+
+from .items import Item
+
+def item_key(it: Item) -> str:
+    """Stable identity of an item: source + mint / url (title as a last resort)."""
+    ident = it.get("mint") or it.get("url") or it.get("title") or ""
+    return f"{it.get('source')}|{ident}"
+
+def item_fingerprint(it: Item) -> str:
+    """Changes whenever anything that feeds the score changes."""
+    payload = json.dumps([it.get("title"), it.get("score_raw"), it.get("timestamp"), it.get("meta")],
+                         sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+class StateStore:
+    """
+    SQLite store that lets consecutive runs share work: scored items keyed by item_key,
+    the keyword aggregates that were last sent to DexScreener, and per-source watermarks.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS items (
+                key TEXT PRIMARY KEY, source TEXT, fingerprint TEXT, item TEXT,
+                scored_at REAL, last_seen REAL);
+            CREATE TABLE IF NOT EXISTS keywords (
+                keyword TEXT PRIMARY KEY, hits INTEGER, score_sum REAL, mappings TEXT, mapped_at REAL);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        self.db.commit()
+
+    # --- items ---
+    def diff_items(self, items: List[Item]) -> Tuple[List[Item], Set[str]]:
+        """Split fetched items into (new or changed items, keys of unchanged items)."""
+        known = dict(self.db.execute("SELECT key, fingerprint FROM items"))
+        fresh, unchanged = [], set()
+        for it in items:
+            k = item_key(it)
+            if known.get(k) == item_fingerprint(it):
+                unchanged.add(k)
+            else:
+                fresh.append(it)
+        return fresh, unchanged
+
+    def upsert_items(self, scored: List[Item], touched: Set[str], now: Optional[float] = None):
+        now = now or time.time()
+        self.db.executemany("INSERT OR REPLACE INTO items VALUES (?,?,?,?,?,?)", [
+            (item_key(it), it.get("source"), item_fingerprint(it), json.dumps(it.to_dict(), ensure_ascii=False, default=str), now, now)
+            for it in scored])
+        self.db.executemany("UPDATE items SET last_seen=? WHERE key=?", [(now, k) for k in touched])
+        self.db.commit()
+
+    def window(self, lookback_hours: float, half_life_hours: float, now: Optional[float] = None) -> List[Item]:
+        """
+        All items seen within the lookback window. Stored scores are decayed by the time elapsed
+        since they were scored, which is exactly what re-running the recency boost would give.
+        """
+        now = now or time.time()
+        since = now - lookback_hours * 3600
+        self.db.execute("DELETE FROM items WHERE last_seen < ?", (since,))
+        self.db.commit()
+        out = []
+        for raw, scored_at in self.db.execute("SELECT item, scored_at FROM items"):
+            it = Item.from_dict(json.loads(raw))
+            hours = (now - scored_at) / 3600.0
+            it["score"] = (it.get("score") or 0.0) * 2 ** (-hours / half_life_hours)
+            out.append(it)
+        return out
+
+    # --- keyword aggregates / mappings ---
+    def moved_keywords(self, agg: List[Dict], min_change: float, remap_after_sec: float,
+                       now: Optional[float] = None) -> Set[str]:
+        """Keywords whose aggregate changed enough (or whose mapping is too old) to query again."""
+        now = now or time.time()
+        moved = set()
+        for a in agg:
+            row = self.db.execute("SELECT hits, score_sum, mapped_at FROM keywords WHERE keyword=?",
+                                  (a["keyword"],)).fetchone()
+            if row is None or row[0] != a["hits"] or now - row[2] > remap_after_sec:
+                moved.add(a["keyword"])
+                continue
+            prev = row[1] or 0.0
+            if abs(a["score_sum"] - prev) > min_change * max(abs(prev), 1e-9):
+                moved.add(a["keyword"])
+        return moved
+
+    def merge_mappings(self, agg: List[Dict], moved: Set[str], fresh: List[Dict],
+                       now: Optional[float] = None) -> List[Dict]:
+        """Store mappings of moved keywords and return all mappings in aggregate order."""
+        now = now or time.time()
+        by_kw = {}
+        for m in fresh:
+            by_kw.setdefault(m["keyword"], []).append(m)
+        out = []
+        for a in agg:
+            kw = a["keyword"]
+            if kw in moved:
+                rows = by_kw.get(kw, [])
+                self.db.execute("INSERT OR REPLACE INTO keywords VALUES (?,?,?,?,?)",
+                                (kw, a["hits"], a["score_sum"], json.dumps(rows, ensure_ascii=False, default=str), now))
+            else:
+                row = self.db.execute("SELECT mappings FROM keywords WHERE keyword=?", (kw,)).fetchone()
+                rows = json.loads(row[0]) if row else []
+            out.extend(rows)
+        self.db.commit()
+        return out
+
+    # --- source watermarks ---
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self.db.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str):
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES (?,?)", (key, value))
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+def open_state(cfg: Dict) -> Optional[StateStore]:
+    """StateStore for run.incremental, or None when incremental mode is off."""
+    inc = cfg["run"].get("incremental") or {}
+    if not inc.get("enabled"):
+        return None
+    return StateStore(inc.get("state_path", "outputs/.state/state.sqlite"))
@@ -0,0 +1,248 @@
+"""
+Fixed-memory trend velocity across runs.
+
+Mentions of every term are counted into a ring of time buckets, each bucket a Count-Min sketch
+(depth x width counters), so memory stays constant however many items are ingested. A
+Space-Saving table tracks the heavy-hitter terms so the fastest movers can be listed without
+enumerating the sketch. Items are counted once: their keys go through a pair of rotating
+Bloom filters. State persists between runs as one .npz file.
+"""
+import hashlib, heapq, math, os, time
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from .state import item_key
+from .items import Item
+from .scoring import iso_epoch
+
+def _hashes(text: str) -> Tuple[int, int]:
+    d = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(d[:4], "little"), int.from_bytes(d[4:], "little") | 1
+
+class SpaceSaving:
+    """
+    Top-`capacity` heavy hitters (Metwally et al.); counts halve on every bucket rollover.
+    The minimum is found through a lazy min-heap: every update pushes (count, term), entries that
+    no longer match `counts` are skipped when popped, and the heap is rebuilt once stale entries
+    pile up, so an update costs O(log capacity) amortized.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict[str, float] = {}
+        self.heap: List[Tuple[float, str]] = []
+
+    def load(self, counts: Dict[str, float]):
+        self.counts = dict(counts)
+        self._rebuild()
+
+    def _rebuild(self):
+        self.heap = [(c, t) for t, c in self.counts.items()]
+        heapq.heapify(self.heap)
+
+    def _set(self, term: str, count: float):
+        self.counts[term] = count
+        heapq.heappush(self.heap, (count, term))
+        if len(self.heap) > 4 * max(self.capacity, 16):
+            self._rebuild()
+
+    def add(self, term: str, n: float = 1):
+        if term in self.counts or len(self.counts) < self.capacity:
+            self._set(term, self.counts.get(term, 0) + n)
+            return
+        while True:
+            count, victim = heapq.heappop(self.heap)
+            if self.counts.get(victim) == count:
+                break  # live entry: the current minimum
+        del self.counts[victim]
+        self._set(term, count + n)  # inherits the evicted count as its error bound
+
+    def decay(self, factor: float):
+        self.counts = {t: c * factor for t, c in self.counts.items() if c * factor >= 0.5}
+        self._rebuild()
+
+    def top(self, k: int) -> List[Tuple[str, float]]:
+        return sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:k]
+
+class VelocityTracker:
+    def __init__(self, bucket_sec: int = 900, n_buckets: int = 96, window_buckets: int = 4,
+                 width: int = 4096, depth: int = 4, heavy_hitters: int = 500, bloom_bits: int = 1 << 24,
+                 seen_ttl_sec: float = 4 * 86400, weight: float = 0.5):
+        self.bucket_sec, self.n, self.window = bucket_sec, n_buckets, window_buckets
+        self.width, self.depth = width, depth
+        self.table = np.zeros((n_buckets, depth, width), dtype=np.uint32)
+        self.epochs = np.full(n_buckets, -1, dtype=np.int64)  # absolute bucket held by each slot
+        self.hh = SpaceSaving(heavy_hitters)
+        self.bloom_bits = bloom_bits
+        self.blooms = [bytearray(bloom_bits // 8), bytearray(bloom_bits // 8)]
+        self.bloom_rotated = time.time()
+        self.seen_ttl = seen_ttl_sec
+        self.latest = -1
+        self.weight = weight
+        self.path: Optional[str] = None
+
+    # --- dedup across runs ---
+    def _bloom_positions(self, key: str) -> List[int]:
+        h1, h2 = _hashes(key)
+        return [(h1 + i * h2) % self.bloom_bits for i in range(4)]
+
+    def _first_seen(self, key: str) -> bool:
+        pos = self._bloom_positions(key)
+        for bloom in self.blooms:
+            if all(bloom[p >> 3] & (1 << (p & 7)) for p in pos):
+                return False
+        for p in pos:
+            self.blooms[0][p >> 3] |= 1 << (p & 7)
+        return True
+
+    def _rotate_blooms(self, now: float):
+        # two generations: a key is "seen" for between seen_ttl/2 and seen_ttl seconds
+        if now - self.bloom_rotated > self.seen_ttl / 2:
+            self.blooms = [bytearray(len(self.blooms[0])), self.blooms[0]]
+            self.bloom_rotated = now
+
+    # --- counting ---
+    def _columns(self, terms: List[str]) -> np.ndarray:
+        """(len(terms), depth) Count-Min columns, double hashing off one blake2b digest per term."""
+        digests = b"".join(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest() for t in terms)
+        h = np.frombuffer(digests, dtype="<u4").reshape(len(terms), 2).astype(np.int64)
+        return (h[:, :1] + np.arange(self.depth) * (h[:, 1:] | 1)) % self.width
+
+    def _advance(self, bucket: int):
+        if bucket > self.latest:
+            if self.latest >= 0:
+                self.hh.decay(0.5 ** (bucket - self.latest))
+            self.latest = bucket
+
+    def observe(self, items: List[Item], index: Dict[str, List[int]], now: Optional[float] = None):
+        """Count each term of `index` (term -> positions in items) for the items not counted before."""
+        now = now or time.time()
+        self._rotate_blooms(now)
+        ts = np.array([iso_epoch(it.get("timestamp")) for it in items], dtype=float)  # None -> NaN
+        buckets = np.floor(np.where(np.isnan(ts) | (ts > now), now, ts) / self.bucket_sec).astype(np.int64)
+        fresh = np.fromiter((self._first_seen(item_key(it)) for it in items), dtype=bool, count=len(items))
+        self._advance(int(now // self.bucket_sec))
+        if not index:
+            return
+        # every (term, position) occurrence in one flat pass
+        terms = list(index)
+        sizes = np.fromiter(map(len, index.values()), dtype=np.int64, count=len(terms))
+        pos = np.fromiter((p for ps in index.values() for p in ps), dtype=np.int64, count=int(sizes.sum()))
+        tid = np.repeat(np.arange(len(terms)), sizes)
+        b = buckets[pos]
+        keep = fresh[pos] & (b >= self.latest - self.n + 1)
+        b, tid = b[keep], tid[keep]
+        if not len(b):
+            return
+        counts = np.bincount(tid, minlength=len(terms))
+        live = np.flatnonzero(counts)
+        cols = np.zeros((len(terms), self.depth), dtype=np.int64)
+        cols[live] = self._columns([terms[t] for t in live.tolist()])
+
+        # recycle ring slots that still hold an older bucket, then add every occurrence to every row
+        for bucket in np.unique(b).tolist():
+            slot = bucket % self.n
+            if self.epochs[slot] != bucket:
+                self.table[slot] = 0
+                self.epochs[slot] = bucket
+        flat = ((b % self.n)[:, None] * self.depth + np.arange(self.depth)) * self.width + cols[tid]
+        self.table += np.bincount(flat.ravel(), minlength=self.table.size).reshape(self.table.shape).astype(np.uint32)
+        self._heavy_hitters(terms, counts, live, cols)
+
+    def _heavy_hitters(self, terms: List[str], counts: np.ndarray, live: np.ndarray, cols: np.ndarray):
+        # tracked terms always update; an untracked one is only a candidate when its Count-Min estimate
+        # over the current window beats the smallest tracked count, and at most `capacity` of them are
+        # tried, so the Space-Saving table is touched O(capacity) times however many terms there are
+        hh = self.hh
+        tracked = [t for t in live.tolist() if terms[t] in hh.counts]
+        for t in tracked:
+            hh.add(terms[t], int(counts[t]))
+        new = np.setdiff1d(live, np.array(tracked, dtype=np.int64), assume_unique=True)
+        if not len(new):
+            return
+        est = np.maximum(self._window_counts(cols[new], self.latest - self.window + 1, self.latest), counts[new])
+        floor = min(hh.counts.values()) if len(hh.counts) >= hh.capacity else 0.0
+        order = np.argsort(-est, kind="stable")[:hh.capacity]
+        for k in order[est[order] > floor].tolist():
+            hh.add(terms[new[k]], int(counts[new[k]]))
+
+    def _window_counts(self, cols: np.ndarray, lo: int, hi: int) -> np.ndarray:
+        """Count-Min estimate per term (rows of `cols`) over absolute buckets [lo, hi]."""
+        slots = [b % self.n for b in range(lo, hi + 1) if self.epochs[b % self.n] == b]
+        if not slots:
+            return np.zeros(len(cols))
+        summed = self.table[slots].sum(axis=0, dtype=np.int64)
+        return summed[np.arange(self.depth)[None, :], cols].min(axis=1).astype(float)
+
+    def stats(self, terms: List[str], now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Per term: `rate` (mentions/hour over the latest window, the partial current bucket
+        pro-rated), `velocity` (change of rate vs the previous window) and `acceleration`
+        (change of velocity).
+        """
+        now = now or time.time()
+        if not terms:
+            return {}
+        cur = int(now // self.bucket_sec)
+        w = self.window
+        cols = self._columns(terms)
+        hours = self.bucket_sec / 3600.0
+        elapsed = (w - 1) * hours + (now - cur * self.bucket_sec) / 3600.0
+        r0 = self._window_counts(cols, cur - w + 1, cur) / max(elapsed, hours / 4)
+        r1 = self._window_counts(cols, cur - 2 * w + 1, cur - w) / (w * hours)
+        r2 = self._window_counts(cols, cur - 3 * w + 1, cur - 2 * w) / (w * hours)
+        r0, r1, r2 = r0.tolist(), r1.tolist(), r2.tolist()
+        return {t: {"rate": r0[i], "velocity": r0[i] - r1[i], "acceleration": (r0[i] - r1[i]) - (r1[i] - r2[i]),
+                    "prev_rate": r1[i]} for i, t in enumerate(terms)}
+
+    def trending(self, k: int = 10, now: Optional[float] = None) -> List[Tuple[str, Dict[str, float]]]:
+        """Heavy-hitter terms ordered by velocity."""
+        st = self.stats([t for t, _ in self.hh.top(self.hh.capacity)], now)
+        return sorted(st.items(), key=lambda kv: kv[1]["velocity"], reverse=True)[:k]
+
+    def boost(self, st: Optional[Dict[str, float]]) -> float:
+        """Ranking multiplier: grows with the log of the relative rise in mention rate."""
+        if not st or self.weight <= 0:
+            return 1.0
+        return 1.0 + self.weight * math.log1p(max(0.0, st["velocity"]) / (st["prev_rate"] + 1.0))
+
+    # --- persistence ---
+    def save(self, path: Optional[str] = None):
+        path = path or self.path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        terms = list(self.hh.counts)
+        tmp = f"{path}.tmp.npz"
+        np.savez_compressed(tmp, table=self.table, epochs=self.epochs,
+                            bloom0=np.frombuffer(self.blooms[0], dtype=np.uint8),
+                            bloom1=np.frombuffer(self.blooms[1], dtype=np.uint8), hh_terms=np.array(terms, dtype=str),
+                            hh_counts=np.array([self.hh.counts[t] for t in terms], dtype=float),
+                            scalars=np.array([self.bloom_rotated, self.latest], dtype=float))
+        os.replace(tmp, path)
+
+    def load(self, path: str) -> "VelocityTracker":
+        self.path = path
+        if not os.path.exists(path):
+            return self
+        with np.load(path) as z:
+            if z["table"].shape != self.table.shape or len(z["bloom0"]) != len(self.blooms[0]):
+                print(f"[velocity] sketch shape changed, starting fresh ({path})")
+                return self
+            self.table, self.epochs = z["table"], z["epochs"]
+            self.blooms = [bytearray(z["bloom0"].tobytes()), bytearray(z["bloom1"].tobytes())]
+            self.hh.load(dict(zip(z["hh_terms"].tolist(), z["hh_counts"].tolist())))
+            self.bloom_rotated, latest = z["scalars"].tolist()
+            self.latest = int(latest)
+        return self
+
+def open_velocity(cfg: Dict) -> Optional[VelocityTracker]:
+    """VelocityTracker from the `velocity` config block (loaded from disk), or None when disabled."""
+    v = cfg.get("velocity") or {}
+    if not v.get("enabled"):
+        return None
+    return VelocityTracker(bucket_sec=v.get("bucket_sec", 900), n_buckets=v.get("n_buckets", 96),
+                           window_buckets=v.get("window_buckets", 4), width=v.get("width", 4096),
+                           depth=v.get("depth", 4), heavy_hitters=v.get("heavy_hitters", 500),
+                           bloom_bits=v.get("bloom_bits", 1 << 24),
+                           seen_ttl_sec=v.get("seen_ttl_sec", 4 * 86400), weight=v.get("weight", 0.5)
+                           ).load(v.get("path", "outputs/.state/velocity.npz"))
@@ -0,0 +1,15 @@
+import queue
+from unittest import mock
+
+from src import daemon
+from src.metrics import metrics
+
+def test_failed_fetch_still_reports_back():
+    metrics.reset()
+    q = queue.Queue()
+    with mock.patch.object(daemon, "fetch_all", side_effect=RuntimeError("boom")):
+        daemon._fetch({}, "reddit", q)
+    name, items, err = q.get_nowait()
+    assert (name, items) == ("reddit", [])
+    assert "boom" in err
+    assert metrics.values["errors_total"][(("component", "reddit"), ("stage", "fetch"))] == 1
@@ -0,0 +1,40 @@
+from src.dedup import collapse_duplicates
+from src.items import Item
+
+def pumpfun(mint, marketcap):
+    return Item("pumpfun", "PEPE (PEPE)", f"https://pump.fun/coin/{mint}", marketcap,
+                "2026-01-01T00:00:00+00:00", mint=mint, name="PEPE", symbol="PEPE", marketcap_usd=marketcap)
+
+def tweet(n, likes, retweets):
+    return Item("twitter", "the moo deng hippo token is going absolutely viral today", f"https://x.com/{n}",
+                likes + 2 * retweets, "2026-01-01T00:00:00+00:00", likes=likes, retweets=retweets)
+
+def test_pumpfun_copycats_keep_best_market_cap():
+    out = collapse_duplicates([pumpfun("a", 400000), pumpfun("b", 300000), pumpfun("c", 250000)])
+    assert len(out) == 1
+    it = out[0]
+    assert it["mint"] == "a"
+    assert it["score_raw"] == 400000
+    assert it["marketcap_usd"] == 400000
+    assert it["dup_count"] == 3
+    assert len(it["urls"]) == 3
+
+def test_tweet_engagement_adds_up():
+    out = collapse_duplicates([tweet(1, 100, 10), tweet(2, 50, 5)])
+    assert len(out) == 1
+    assert out[0]["likes"] == 150
+    assert out[0]["retweets"] == 15
+    assert out[0]["score_raw"] == 180
+
+def test_sources_and_trends_regions_never_mix():
+    cashtags = [Item("twitter", "$PEPE", f"https://x.com/{n}", 100, "2026-01-01T00:00:00+00:00", likes=100, retweets=0)
+                for n in range(40)]
+    trends = [Item("google_trends", "pepe coin", "", 80, "2026-01-01T00:00:00+00:00", region=r)
+              for r in ("US", "GB", "JP")]
+    out = collapse_duplicates([pumpfun("a", 5000), *cashtags, *trends])
+    by_source = {}
+    for it in out:
+        by_source.setdefault(it["source"], []).append(it)
+    assert by_source["pumpfun"][0]["score_raw"] == 5000
+    assert [(it["likes"], it["dup_count"]) for it in by_source["twitter"]] == [(4000, 40)]
+    assert sorted(it["region"] for it in by_source["google_trends"]) == ["GB", "JP", "US"]
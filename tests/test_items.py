@@ -0,0 +1,14 @@
+import pytest
+
+from src.items import Item
+
+def test_only_fields_and_meta_are_keys():
+    it = Item("pumpfun", "PEPE", "https://pump.fun/x", 5, "2026-10-18T00:00:00Z", symbol="PEPE")
+    assert it.get("copy") is None and it.get("to_dict", 0) == 0
+    assert "copy" not in it and "__class__" not in it
+    with pytest.raises(KeyError):
+        it["copy"]
+    with pytest.raises(KeyError):
+        it["copy"] = 1
+    assert it.get("meta") == {"symbol": "PEPE"} and it["title"] == "PEPE"
+    assert it.get("score", 0) == 0 and "score" not in it
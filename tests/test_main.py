@@ -0,0 +1,41 @@
+from unittest import mock
+
+import pytest
+import yaml
+
+from src import main, ingest
+
+@pytest.fixture
+def config(tmp_path):
+    cfg = main.load_config("config.yaml")
+    cfg["run"]["out_dir"] = str(tmp_path)
+    cfg["run"]["incremental"]["enabled"] = True
+    cfg["metrics"]["enabled"] = False
+    cfg["profiles"] = {"alpha": {"filters": {"whitelist_any": ["pepe"]}},
+                       "beta": {"run": {"incremental": {"enabled": False}}}}
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.safe_dump(cfg, allow_unicode=True), encoding="utf-8")
+    return str(path)
+
+def test_fetch_and_daemon_use_the_profile(config, tmp_path):
+    with mock.patch.object(main, "cmd_fetch") as fetch, mock.patch.object(main, "cmd_run") as run:
+        main.main(["--config", config, "--profile", "alpha", "fetch"])
+        main.main(["--config", config, "--profile", "alpha", "--daemon"])
+    for cmd in (fetch, run):
+        cfg = cmd.call_args[0][0]
+        assert cfg["filters"]["whitelist_any"] == ["pepe"]
+        assert cfg["run"]["out_dir"] == str(tmp_path / "alpha")
+
+def test_daemon_takes_a_single_profile(config):
+    with pytest.raises(SystemExit):
+        main.main(["--config", config, "--profile", "alpha", "--profile", "beta", "--daemon"])
+
+@pytest.mark.parametrize("profiles, incremental", [(["alpha"], True), (["alpha", "beta"], False), ([], False)])
+def test_a_full_mode_profile_gets_a_full_fetch(config, profiles, incremental):
+    seen = []
+    def fetch_all(cfg, only=None):
+        seen.append(cfg["run"]["incremental"]["enabled"])
+        raise KeyboardInterrupt  # stop right after the shared fetch
+    with mock.patch.object(ingest, "fetch_all", fetch_all), pytest.raises(KeyboardInterrupt):
+        main.main(["--config", config, *[a for p in profiles for a in ("--profile", p)]])
+    assert seen == [incremental]
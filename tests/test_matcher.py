@@ -0,0 +1,19 @@
+import random
+
+from src.matcher import KeywordMatcher
+
+WORDS = ["coin", "Pepe", "doge", "ai", "sol", "$wif", "中文", "meme coin"]
+
+def test_substring_parity():
+    m = KeywordMatcher(WORDS)
+    rng = random.Random(0)
+    alphabet = list("abcdeginopstwfl $-_") + ["中", "文", "AI", "Coin"]
+    texts = ["bitcoin", "altcoins", "PEPECOIN", "said", "solana", "a $WIF hat", "说中文", "memecoin", ""]
+    texts += ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20))) for _ in range(2000)]
+    for text in texts:
+        assert m.search(text) == any(k.lower() in text.lower() for k in WORDS), text
+
+def test_whole_words():
+    m = KeywordMatcher(["coin", "中文"], whole_words=True)
+    assert m.search("a Coin!") and m.search("说中文")
+    assert not m.search("bitcoin") and not m.search("coins")
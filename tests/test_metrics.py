@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+from src.metrics import metrics, recorded_run
+
+def config(tmp_path):
+    return {"run": {"out_dir": str(tmp_path)}, "metrics": {"enabled": True}}
+
+def test_failed_run_still_writes_metrics(tmp_path):
+    cfg = config(tmp_path)
+    with pytest.raises(RuntimeError):
+        with recorded_run(cfg):
+            with metrics.stage("score"):
+                raise RuntimeError("boom")
+    prom = (tmp_path / "metrics" / "hotspot_mapper.prom").read_text()
+    assert "hotspot_run_success 0.0" in prom
+    assert 'hotspot_errors_total{component="score",stage="score"} 1.0' in prom
+    assert json.loads((tmp_path / "run_summary.json").read_text())["status"] == "failed"
+
+def test_stage_subcommands_write_their_own_files(tmp_path):
+    cfg = config(tmp_path)
+    with recorded_run(cfg, "fetch"):
+        metrics.set("stage_items", 3, stage="fetch")
+    prom = (tmp_path / "metrics" / "hotspot_mapper_fetch.prom").read_text()
+    assert 'hotspot_run_success{command="fetch"} 1.0' in prom
+    assert 'hotspot_stage_items{command="fetch",stage="fetch"} 3.0' in prom
+    assert not (tmp_path / "metrics" / "hotspot_mapper.prom").exists()
+    assert (tmp_path / "run_summary_fetch.json").exists()
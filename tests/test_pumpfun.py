@@ -0,0 +1,40 @@
+from unittest import mock
+
+from src.sources import pumpfun
+
+WATERMARK = 1_700_000_000_000
+
+def project(mint, created_ms, marketcap=1000):
+    return {"mint": mint, "name": mint, "symbol": mint.upper(), "createdAt": created_ms, "marketCap": marketcap}
+
+def pages(by_sort):
+    def get(url, params):
+        return by_sort[params["sort"]](params["offset"])
+    return get
+
+def crawl(by_sort, max_pages=1, limit=2):
+    with mock.patch.object(pumpfun, "_get", pages(by_sort)):
+        return pumpfun.crawl_pumpfun(limit=limit, max_pages=max_pages, watermark_ms=WATERMARK)
+
+def test_other_sorts_do_not_move_watermark():
+    traded = [project("old", WATERMARK + 10_000_000, marketcap=9e6)]
+    _, newest = crawl({"createdAt": lambda off: [], "marketCap": lambda off: traded, "holders": lambda off: []})
+    assert newest == WATERMARK
+
+def test_failed_created_walk_keeps_watermark():
+    fresh = [project("new", WATERMARK + 5000)]
+    _, newest = crawl({"createdAt": lambda off: None, "marketCap": lambda off: fresh, "holders": lambda off: []})
+    assert newest == WATERMARK
+
+def test_truncated_created_walk_advances_and_logs_the_gap(capsys):
+    full = lambda off: [project(f"n{off}a", WATERMARK + 9_000_000 - off), project(f"n{off}b", WATERMARK + 8_000_000 - off)]
+    items, newest = crawl({"createdAt": full, "marketCap": lambda off: [], "holders": lambda off: []}, max_pages=2)
+    assert len(items) == 4
+    assert newest == WATERMARK + 9_000_000  # not stuck: the next run resumes from the newest launch
+    assert "gap" in capsys.readouterr().out
+
+def test_complete_created_walk_advances_watermark():
+    created = [project("new", WATERMARK + 5000), project("seen", WATERMARK - 5000)]
+    items, newest = crawl({"createdAt": lambda off: created, "marketCap": lambda off: [], "holders": lambda off: []})
+    assert [it["mint"] for it in items] == ["new"]
+    assert newest == WATERMARK + 5000
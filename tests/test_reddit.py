@@ -0,0 +1,47 @@
+import time
+from itertools import islice
+from types import SimpleNamespace
+from unittest import mock
+
+from src.sources import reddit
+
+def post(n, age_hours, score):
+    return SimpleNamespace(fullname=f"t3_{n}", subreddit=SimpleNamespace(display_name="memeeconomy"),
+                           title=f"post {n}", permalink=f"/r/memeeconomy/{n}", score=score, num_comments=0,
+                           created_utc=time.time() - age_hours * 3600)
+
+def crawl(posts, after=None, top_n=10):
+    client = SimpleNamespace(subreddit=lambda name: SimpleNamespace(new=lambda limit: islice(posts, limit)))
+    with mock.patch.object(reddit, "_client", lambda *a: client), \
+            mock.patch.dict("os.environ", {"REDDIT_CLIENT_ID": "x", "REDDIT_CLIENT_SECRET": "x"}):
+        return reddit.crawl_reddit(["memeeconomy"], 300, lookback_hours=24, top_n=top_n, after_fullname=after)
+
+def test_young_posts_stay_ahead_of_the_watermark():
+    items, wm = crawl([post("a", 0.1, 5), post("b", 2, 40), post("c", 7, 500), post("d", 9, 10)])
+    assert [it["title"] for it in items] == ["post c"]
+    assert wm == "t3_c"
+    # a later run sees "a" again, now above the threshold
+    items, wm = crawl([post("a", 3, 800), post("b", 5, 40), post("c", 10, 500)], after=wm)
+    assert [it["title"] for it in items] == ["post a"]
+    assert wm == "t3_c"
+
+def test_watermark_unchanged_without_settled_posts():
+    _, wm = crawl([post("a", 0.1, 5)], after="t3_z")
+    assert wm == "t3_z"
+
+def test_failed_walk_keeps_the_watermark():
+    def listing():
+        yield post("a", 0.1, 5)
+        yield post("c", 7, 500)
+        raise RuntimeError("503")
+    items, wm = crawl(listing(), after="t3_z")
+    assert items[-1]["title"].startswith("[error]")
+    assert wm == "t3_z"
+
+def test_truncated_walk_keeps_the_watermark():
+    # 50 settled posts in the window, but the listing limit (top_n*5) stops the walk at 10
+    posts = [post(i, 7 + i * 0.1, 10) for i in range(50)] + [post("old", 30, 10)]
+    _, wm = crawl(posts, after="t3_z", top_n=2)
+    assert wm == "t3_z"
+    _, wm = crawl(posts, after="t3_z", top_n=20)  # reaches the lookback boundary
+    assert wm == "t3_0"
@@ -0,0 +1,40 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from src.items import Item
+from src.scoring import score_items
+
+WEIGHTS = {"recency_hours_half_life": 24, "reddit_upvote_scale": 0.002,
+           "twitter_like_scale": 0.001, "twitter_retweet_scale": 0.002}
+
+def reference(it, now):
+    # the scoring rules spelled out with datetime arithmetic, one item at a time
+    src = it.source
+    if src == "twitter":
+        base = (it.likes or 0) * 0.001 + (it.retweets or 0) * 0.002
+    elif src == "reddit":
+        base = it.score_raw * 0.002
+    else:
+        base = (it.score_raw or 0) / 100.0
+    try:
+        dt = datetime.fromisoformat(it.timestamp.replace("Z", "+00:00"))
+    except Exception:
+        return base
+    dt = dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    return base * 2 ** (-(now - dt).total_seconds() / 3600.0 / 24)
+
+def test_score_items_parity():
+    rnd = random.Random(3)
+    now = datetime(2026, 10, 18, 12, tzinfo=timezone.utc)
+    items = []
+    for i in range(2000):
+        src = ("twitter", "reddit", "google_trends", "pumpfun")[i % 4]
+        dt = now - timedelta(minutes=rnd.randint(-30, 72 * 60), microseconds=rnd.randint(0, 999999))
+        ts = rnd.choice([dt.isoformat(), dt.strftime("%Y-%m-%dT%H:%M:%SZ"), dt.replace(tzinfo=None).isoformat(),
+                         dt.astimezone(timezone(timedelta(hours=-7))).isoformat(), "", "not a date"])
+        likes, rts = rnd.randint(0, 5000), rnd.randint(0, 800)
+        extra = {"likes": likes, "retweets": rts} if src == "twitter" else {}
+        items.append(Item(src, f"item {i}", "", rnd.randint(0, 100000), ts, **extra))
+    scored = score_items([it.copy() for it in items], WEIGHTS, now=now)
+    for it, s in zip(items, scored):
+        assert abs(s["score"] - reference(it, now)) <= 1e-9 * max(1.0, abs(reference(it, now))), it
@@ -0,0 +1,11 @@
+from unittest import mock
+
+from src.notifiers import telegram
+
+def test_requests_never_outlast_the_deadline():
+    q = telegram.TelegramQueue("x", deadline_sec=3, attempts=1)
+    seen = []
+    with mock.patch.object(q, "_post", lambda chat_id, text, markdown, timeout: seen.append(timeout) or (200, {"ok": True})):
+        summary = q.send(["1"], [("hi", "hi")])
+    assert summary["sent"] == 1
+    assert 0 < seen[0] <= 3
@@ -0,0 +1,16 @@
+from src.mapping.token_index import TokenIndex
+
+def pair(address, symbol):
+    return {"chainId": "solana", "pairAddress": address, "baseToken": {"symbol": symbol, "name": symbol}}
+
+def test_a_pair_dropping_out_of_search_does_not_block_fresh_ones(tmp_path):
+    index = TokenIndex(str(tmp_path / "index.sqlite"), max_age_sec=3600)
+    t0 = 1_800_000_000
+    index.add_pairs([pair("A", "PEPE"), pair("B", "PEPE")], now=t0)
+    index.add_pairs([pair("A", "PEPE")], now=t0 + 7200)  # B is no longer in the search results
+    found = index.lookup("pepe", now=t0 + 7200)
+    assert [p["pairAddress"] for p in found] == ["A"]
+    assert index.db.execute("SELECT COUNT(*) FROM tokens").fetchone()[0] == 1
+    assert index.db.execute("SELECT COUNT(DISTINCT key) FROM grams").fetchone()[0] == 1
+    assert index.lookup("pepe", now=t0 + 7200 + 3601) is None  # A aged out as well
+    index.close()
@@ -0,0 +1,25 @@
+from unittest import mock
+
+from src.items import Item
+from src.metrics import metrics
+from src.sources import twitter
+
+def tweets():
+    yield Item("twitter", "pepe to the moon", "https://x.com/1", 10, "2026-10-18T00:00:00Z")
+    raise RuntimeError("snscrape exited 1")
+
+def test_failure_after_partial_results_is_recorded(capsys):
+    metrics.reset()
+    with mock.patch.object(twitter, "iter_twitter", lambda *a: tweets()):
+        items = twitter.fetch_twitter(["pepe"], 24, 100, 10)
+    assert [it["title"] for it in items] == ["pepe to the moon"]
+    assert metrics.values["errors_total"][(("component", "twitter"), ("stage", "fetch"))] == 1
+    assert "snscrape exited 1" in capsys.readouterr().out
+
+def test_failure_without_results_returns_an_error_item():
+    def failing(*a):
+        raise RuntimeError("boom")
+        yield
+    with mock.patch.object(twitter, "iter_twitter", failing):
+        items = twitter.fetch_twitter(["pepe"], 24, 100, 10)
+    assert [it["title"] for it in items] == ["[error] boom"]
@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+import random
+
+from src.velocity import SpaceSaving
+
+def test_space_saving_matches_linear_scan_eviction():
+    rnd = random.Random(1)
+    stream = [(f"t{int(rnd.paretovariate(1.2))}", rnd.randint(1, 3)) for _ in range(20000)]
+    ref = {}
+    for term, n in stream:
+        if term in ref or len(ref) < 100:
+            ref[term] = ref.get(term, 0) + n
+        else:
+            victim = min(ref, key=ref.get)
+            ref[term] = ref.pop(victim) + n
+    ss = SpaceSaving(100)
+    for term, n in stream:
+        ss.add(term, n)
+    assert sorted(ss.counts.values()) == sorted(ref.values())
+    assert [t for t, _ in ss.top(5)] == [t for t, _ in sorted(ref.items(), key=lambda kv: kv[1], reverse=True)[:5]]
+
+def test_space_saving_after_decay_and_load():
+    ss = SpaceSaving(3)
+    for term in "aaaabbbcc":
+        ss.add(term)
+    ss.decay(0.5)
+    ss.add("d")  # evicts c (count 1.0)
+    assert set(ss.counts) == {"a", "b", "d"}
+    restored = SpaceSaving(3)
+    restored.load(ss.counts)
+    restored.add("e")
+    assert "e" in restored.counts and len(restored.counts) == 3
+
+def test_observe_counts_every_fresh_occurrence():
+    import numpy as np
+    from src.items import Item
+    from src.velocity import VelocityTracker, _hashes
+    now = 1_800_000_000.0
+    rnd = random.Random(2)
+    items = [Item("twitter", f"t{i}", f"https://x.com/{i}", 1,
+                  datetime.fromtimestamp(now - rnd.randint(0, 7200), timezone.utc).isoformat()) for i in range(300)]
+    index = {}
+    for i in range(300):
+        for term in {f"w{int(rnd.paretovariate(1.1))}" for _ in range(3)}:
+            index.setdefault(term, []).append(i)
+    vt = VelocityTracker(width=512, depth=3, heavy_hitters=10, bloom_bits=1 << 16)
+    vt.observe(items[:100], {t: [p for p in ps if p < 100] for t, ps in index.items()}, now=now)
+    vt.observe(items, index, now=now)  # the first 100 items were already counted
+
+    expected = np.zeros_like(vt.table)
+    for term, ps in index.items():
+        h1, h2 = _hashes(term)
+        for p in ps:
+            b = int(datetime.fromisoformat(items[p].timestamp).timestamp() // 900)
+            for r in range(3):
+                expected[b % vt.n, r, (h1 + r * h2) % 512] += 1
+    assert (vt.table == expected).all()
+    top = sorted(index, key=lambda t: len(index[t]), reverse=True)[:3]
+    assert set(top) <= set(vt.hh.counts)